@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class BonrateproConfig(AppConfig):
+    """Project-wide hooks that belong to no single app"""
+    name = 'bonratepro'
+
+    def ready(self):
+        # Applies the SQLite pragmas to every new connection
+        from .db import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='bonratepro.configure_sqlite')
+        # Lets RequestTimingMiddleware count queries on any thread
+        from .middleware import install_query_counter
+        connection_created.connect(install_query_counter, dispatch_uid='bonratepro.install_query_counter')
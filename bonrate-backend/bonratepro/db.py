@@ -0,0 +1,14 @@
+from django.conf import settings
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver applying the SQLITE_TUNED pragmas.
+
+    WAL is stored in the database file, but busy_timeout and synchronous
+    are per connection, so this runs for every new connection.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNED:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
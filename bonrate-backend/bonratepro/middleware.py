@@ -0,0 +1,103 @@
+import random
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('bonratepro.requests')
+
+# Query counter of the request being handled; sync_to_async carries it to
+# whichever thread runs the ORM call
+_request_queries = ContextVar('request_queries', default=None)
+
+class RequestTimingMiddleware:
+    """Log method, route, status, duration and DB query count per request.
+
+    Only REQUEST_LOG_SAMPLE_RATE of ordinary requests are logged; server
+    errors and requests slower than REQUEST_LOG_SLOW_MS always are. Queries
+    are counted by an execute wrapper on every connection, so no query log
+    is kept and queries made from async views on other threads count too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_LOG_SLOW_MS
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        token = _request_queries.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.log(request, response, time.perf_counter() - start, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        token = _request_queries.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.log(request, response, time.perf_counter() - start, counter.count)
+        return response
+
+    def log(self, request, response, elapsed, db_queries):
+        duration_ms = round(elapsed * 1000, 2)
+        status = response.status_code
+        if status >= 500:
+            level = logging.ERROR
+        elif duration_ms >= self.slow_ms:
+            level = logging.WARNING
+        elif self.sample_rate >= 1 or random.random() < self.sample_rate:
+            level = logging.INFO
+        else:
+            return
+        if not logger.isEnabledFor(level):
+            return
+
+        match = request.resolver_match
+        route = ('/' + match.route) if match is not None else None
+        logger.log(
+            level,
+            "%s %s %s %.1fms",
+            request.method,
+            route or request.path,
+            status,
+            duration_ms,
+            extra={
+                'method': request.method,
+                'route': route,
+                'path': request.path,
+                'status': status,
+                'duration_ms': duration_ms,
+                'db_queries': db_queries,
+            },
+        )
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+def count_request_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's counter"""
+    counter = _request_queries.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created receiver installing count_request_queries once per connection"""
+    if count_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_request_queries)
@@ -17,9 +17,12 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path,include
+from contacts.views import review_redirect, tracking_pixel
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/contacts/', include('contacts.urls')),
+    path('r/<str:code>', review_redirect, name='review-redirect'),
+    path('t/o/<str:code>.gif', tracking_pixel, name='tracking-pixel'),
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Contact
+from .models import Campaign, CampaignEnrollment, CampaignStep, Contact, EmailJob, EmailTemplate, TrackingEvent
 
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
@@ -24,4 +24,49 @@ class ContactAdmin(admin.ModelAdmin):
             'fields': ('id',),
             'classes': ('collapse',)
         })
-    )
\ No newline at end of file
+    )
+
+@admin.register(EmailJob)
+class EmailJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'total_count', 'processed_count', 'success_count', 'failed_count', 'claimed_by', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__email']
+    readonly_fields = ['id', 'created_at', 'started_at', 'finished_at']
+    list_per_page = 25
+
+@admin.register(EmailTemplate)
+class EmailTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'is_default', 'version', 'updated_at']
+    list_filter = ['is_default']
+    search_fields = ['name', 'user__email']
+    readonly_fields = ['version', 'created_at', 'updated_at']
+    list_per_page = 25
+
+@admin.register(TrackingEvent)
+class TrackingEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'contact_id', 'event_type', 'occurred_at']
+    list_filter = ['event_type', 'occurred_at']
+    readonly_fields = ['contact', 'event_type', 'occurred_at']
+    # Large append-only table: skip the COUNT(*) for the paginator
+    show_full_result_count = False
+    list_per_page = 25
+
+class CampaignStepInline(admin.TabularInline):
+    model = CampaignStep
+    extra = 0
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'status', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['name', 'user__email']
+    inlines = [CampaignStepInline]
+    list_per_page = 25
+
+@admin.register(CampaignEnrollment)
+class CampaignEnrollmentAdmin(admin.ModelAdmin):
+    list_display = ['contact', 'campaign', 'status', 'next_step', 'next_run_at', 'attempts']
+    list_filter = ['status']
+    raw_id_fields = ['contact', 'campaign']
+    show_full_result_count = False
+    list_per_page = 25
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 
 class ContactsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'contacts'
\ No newline at end of file
+    name = 'contacts'
+
+    def ready(self):
+        # Registers the signal handlers that invalidate cached short links
+        # and keep the review stats rollups current
+        from . import review_stats, short_links  # noqa: F401
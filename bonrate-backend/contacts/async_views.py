@@ -0,0 +1,116 @@
+# Async versions of the Google Places proxy views. Under an ASGI worker a
+# request waiting on Google yields the event loop instead of holding a sync
+# worker, so slow place lookups no longer block the contacts endpoints.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from .autocomplete import prefix_cache, async_in_flight
+from .business_profile_api import autocomplete_params, format_predictions, format_business_details, place_photo_url
+from .google_places import (
+    fetch_place_record, format_place_record, format_text_search, place_details_params, text_search_params,
+)
+from .http_client import GoogleAPIError, get_async_google_client
+from .places_cache import (
+    get_cached_record, get_cached_search, make_cache_key, normalize_search, record_stat,
+    refresh_record, search_cache_key, store_record, store_search,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cache calls run off the event loop so any configured backend is safe here
+aget_cached_search = sync_to_async(get_cached_search, thread_sensitive=False)
+astore_search = sync_to_async(store_search, thread_sensitive=False)
+aget_cached_record = sync_to_async(get_cached_record, thread_sensitive=False)
+astore_record = sync_to_async(store_record, thread_sensitive=False)
+arecord_stat = sync_to_async(record_stat, thread_sensitive=False)
+
+
+async def places_search(request):
+    """Async counterpart of views.GooglePlacesSearchView"""
+    query = request.GET.get('query', '').strip()
+    location = request.GET.get('location', '').strip()
+
+    if not query:
+        return JsonResponse({"error": "Query parameter is required"}, status=400)
+
+    key = search_cache_key('textsearch', query, location)
+    results = await aget_cached_search(key)
+    if results is None:
+        try:
+            data = await get_async_google_client().get_json('textsearch/json', text_search_params(query, location))
+            status, results = format_text_search(data)
+        except GoogleAPIError as e:
+            logger.warning("Error searching places: %s", e)
+            status, results = 'ERROR', []
+        await astore_search(key, status, results)
+
+    return JsonResponse({"results": results})
+
+
+async def places_autocomplete(request):
+    """Async counterpart of business_profile_api.GooglePlacesSearchView"""
+    query = request.GET.get('query', '').strip()
+    if not query:
+        return JsonResponse({'results': []})
+
+    session_token = request.GET.get('sessiontoken') or None
+
+    results, exact = prefix_cache.lookup(query)
+    if results is not None:
+        await arecord_stat('autocomplete_exact_hits' if exact else 'autocomplete_prefix_hits')
+        return JsonResponse({'results': results})
+
+    async def fetch():
+        key = search_cache_key('autocomplete', query)
+        cached = await aget_cached_search(key)
+        if cached is not None:
+            return cached
+        await arecord_stat('autocomplete_upstream_calls')
+        data = await get_async_google_client().get_json('autocomplete/json', autocomplete_params(query, session_token))
+        status, fetched = format_predictions(data)
+        await astore_search(key, status, fetched)
+        return fetched
+
+    try:
+        results, shared = await async_in_flight.do(normalize_search(query)[0], fetch)
+        if shared:
+            await arecord_stat('autocomplete_coalesced')
+        prefix_cache.insert(query, results)
+        return JsonResponse({'results': results})
+    except GoogleAPIError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+async def place_details(request, place_id):
+    """Async counterpart of business_profile_api.GooglePlaceDetailsView"""
+    session_token = request.GET.get('sessiontoken') or None
+    if session_token:
+        await arecord_stat('completed_searches')
+
+    fresh_ttl = settings.GOOGLE_PLACE_DETAILS_FRESH_TTL
+    stale_ttl = settings.GOOGLE_PLACE_DETAILS_STALE_TTL
+    key = make_cache_key('details', place_id)
+
+    try:
+        # A stale record is refreshed on a background thread with the sync client
+        found, result = await aget_cached_record(
+            key, fresh_ttl,
+            lambda: refresh_record(key, lambda: fetch_place_record(place_id), fresh_ttl, stale_ttl),
+        )
+        if not found:
+            data = await get_async_google_client().get_json('details/json', place_details_params(place_id, session_token))
+            status, record = format_place_record(data)
+            result = await astore_record(key, status, record, fresh_ttl, stale_ttl, settings.GOOGLE_PLACES_NEGATIVE_CACHE_TTL)
+
+        if result is not None:
+            return JsonResponse(format_business_details(place_id, result, lambda ref: place_photo_url(request, ref)))
+
+        return JsonResponse({'error': 'Place not found'}, status=404)
+
+    except GoogleAPIError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
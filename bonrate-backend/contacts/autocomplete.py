@@ -0,0 +1,193 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from .places_cache import normalize_search
+
+
+# Places Autocomplete returns at most this many predictions per input
+UPSTREAM_PREDICTION_LIMIT = 5
+
+
+def _tokens(text):
+    return normalize_search(text)[0].split()
+
+
+def matches_prefix(prediction, query_tokens):
+    """True if every query word starts some word of the prediction.
+
+    Mirrors how Places Autocomplete matches, so a longer query can be
+    answered by filtering the predictions cached for a shorter one.
+    """
+    words = _tokens(prediction.get('description') or prediction.get('name') or '')
+    return all(any(word.startswith(token) for word in words) for token in query_tokens)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entry')
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+
+class PrefixCache:
+    """In-process trie of normalized autocomplete inputs to their predictions.
+
+    ``lookup`` returns the exact entry if present; otherwise it finds the
+    longest cached prefix and filters its predictions locally. That is only
+    done when the prefix got fewer than ``result_limit`` predictions: a full
+    list may have left out better matches for the longer input. Entries
+    expire after ``ttl`` seconds and the least recently used are evicted
+    beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries, ttl, min_prefix_length, result_limit=UPSTREAM_PREDICTION_LIMIT):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_prefix_length = min_prefix_length
+        self.result_limit = result_limit
+        self.root = _TrieNode()
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _node(self, key, create=False):
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _TrieNode()
+            node = child
+        return node
+
+    def insert(self, query, predictions):
+        """Remember the predictions of an OK response.
+
+        Upstream errors and ZERO_RESULTS come back empty and are not kept
+        here: the shared places cache already gives them no caching and a
+        short negative TTL respectively.
+        """
+        if not predictions:
+            return
+        key = ' '.join(_tokens(query))
+        with self.lock:
+            self._node(key, create=True).entry = (predictions, time.monotonic() + self.ttl)
+            self.lru[key] = None
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.max_entries:
+                evicted, _ = self.lru.popitem(last=False)
+                node = self._node(evicted)
+                if node is not None:
+                    node.entry = None
+
+    def lookup(self, query):
+        """Return ``(predictions, exact)`` or ``(None, False)`` on a miss"""
+        key = ' '.join(_tokens(query))
+        now = time.monotonic()
+        with self.lock:
+            node = self.root
+            best = None
+            for depth, char in enumerate(key, start=1):
+                node = node.children.get(char)
+                if node is None:
+                    break
+                if node.entry is not None and node.entry[1] > now and depth >= self.min_prefix_length:
+                    best = (key[:depth], node.entry[0])
+            if best is None:
+                return None, False
+            prefix, predictions = best
+            self.lru.move_to_end(prefix)
+
+        if prefix == key:
+            return predictions, True
+        if len(predictions) >= self.result_limit:
+            # Truncated upstream, so the longer input may have matches not in this list
+            return None, False
+        query_tokens = key.split()
+        filtered = [prediction for prediction in predictions if matches_prefix(prediction, query_tokens)]
+        if filtered:
+            return filtered, False
+        return None, False
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls so only one reaches upstream"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        """Run ``fn`` once per in-flight ``key``; returns ``(result, shared)``"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = {'event': threading.Event()}
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call['event'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['result'], True
+
+        try:
+            call['result'] = fn()
+            return call['result'], False
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call['event'].set()
+
+
+class AsyncSingleFlight:
+    """asyncio version of SingleFlight: followers await the leader's future"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, coro_fn):
+        loop = asyncio.get_running_loop()
+        future = self.calls.get((loop, key))
+        if future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not this request: make the call again
+                return await self.do(key, coro_fn)
+
+        future = self.calls[(loop, key)] = loop.create_future()
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result, False
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader-only failure is not logged as unhandled
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled, e.g. the client disconnected; followers must not wait forever
+            future.cancel()
+            raise
+        finally:
+            self.calls.pop((loop, key), None)
+
+
+prefix_cache = PrefixCache(
+    max_entries=settings.AUTOCOMPLETE_PREFIX_CACHE_ENTRIES,
+    ttl=settings.GOOGLE_PLACES_CACHE_TTL,
+    min_prefix_length=settings.AUTOCOMPLETE_MIN_PREFIX_LENGTH,
+)
+in_flight = SingleFlight()
+async_in_flight = AsyncSingleFlight()
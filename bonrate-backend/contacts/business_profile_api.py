@@ -1,9 +1,97 @@
-import requests
 from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from .places_cache import cached_search, get_cache_stats, normalize_search, record_stat
+from .autocomplete import prefix_cache, in_flight
+from .google_places import get_place_record
+from .http_client import get_google_client, GoogleAPIError
+from .photo_cache import get_photo, PhotoNotFound
+
+def autocomplete_params(query, session_token=None):
+    params = {
+        'input': query,
+        'key': settings.GOOGLE_PLACES_API_KEY,
+        'types': 'establishment'
+    }
+    if session_token:
+        params['sessiontoken'] = session_token
+    return params
+
+def format_predictions(data):
+    """Turn an Autocomplete response into ``(status, results)``"""
+    if data.get('status') == 'OK':
+        results = []
+        for prediction in data.get('predictions', [])[:10]:
+            results.append({
+                'place_id': prediction.get('place_id'),
+                'description': prediction.get('description'),
+                'name': prediction.get('structured_formatting', {}).get('main_text', ''),
+                'address': prediction.get('structured_formatting', {}).get('secondary_text', '')
+            })
+        return 'OK', results
+    
+    return data.get('status'), []
+
+def place_photo_url(request, photo_reference, width=800):
+    """Absolute URL of our photo proxy, so the API key never reaches the client"""
+    path = reverse('business-google-place-photo', args=[photo_reference])
+    return request.build_absolute_uri(f"{path}?w={width}")
+
+def format_business_details(place_id, result, photo_url):
+    """Project the business profile fields out of a cached Place Details record.
+
+    ``photo_url`` maps a photo reference to the URL handed to the client.
+    """
+    # Process photos
+    photos = []
+    if result.get('photos'):
+        for photo in result.get('photos', [])[:10]:
+            photos.append({
+                'url': photo_url(photo.get('photo_reference')),
+                'width': photo.get('width'),
+                'height': photo.get('height')
+            })
+    
+    # Process reviews
+    reviews = []
+    if result.get('reviews'):
+        for review in result.get('reviews', [])[:3]:
+            reviews.append({
+                'author_name': review.get('author_name'),
+                'rating': review.get('rating'),
+                'text': review.get('text'),
+                'time': review.get('time'),
+                'profile_photo_url': review.get('profile_photo_url')
+            })
+    
+    # Process opening hours
+    opening_hours = None
+    if result.get('opening_hours'):
+        opening_hours = {
+            'open_now': result.get('opening_hours', {}).get('open_now'),
+            'weekday_text': result.get('opening_hours', {}).get('weekday_text', [])
+        }
+    
+    return {
+        'place_id': place_id,
+        'name': result.get('name'),
+        'address': result.get('formatted_address'),
+        'phone': result.get('formatted_phone_number'),
+        'website': result.get('website'),
+        'rating': result.get('rating'),
+        'user_ratings_total': result.get('user_ratings_total'),
+        'google_maps_url': result.get('url'),
+        'business_status': result.get('business_status'),
+        'types': result.get('types', []),
+        'photos': photos,
+        'reviews': reviews,
+        'opening_hours': opening_hours
+    }
 
 class GooglePlacesSearchView(APIView):
     permission_classes = []  # Temporarily remove auth for testing
@@ -13,101 +101,100 @@ class GooglePlacesSearchView(APIView):
         if not query:
             return Response({'results': []})
         
-        url = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
-        params = {
-            'input': query,
-            'key': settings.GOOGLE_PLACES_API_KEY,
-            'types': 'establishment'
-        }
+        # Google bills autocomplete keystrokes plus the final details call as
+        # one session when they share a token
+        session_token = request.GET.get('sessiontoken') or None
+        
+        # Answer from this worker's prefix trie when an earlier keystroke covers it
+        results, exact = prefix_cache.lookup(query)
+        if results is not None:
+            record_stat('autocomplete_exact_hits' if exact else 'autocomplete_prefix_hits')
+            return Response({'results': results})
         
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get('status') == 'OK':
-                results = []
-                for prediction in data.get('predictions', [])[:10]:
-                    results.append({
-                        'place_id': prediction.get('place_id'),
-                        'description': prediction.get('description'),
-                        'name': prediction.get('structured_formatting', {}).get('main_text', ''),
-                        'address': prediction.get('structured_formatting', {}).get('secondary_text', '')
-                    })
-                return Response({'results': results})
-            
-            return Response({'results': []})
+            results, shared = in_flight.do(
+                normalize_search(query)[0],
+                lambda: cached_search('autocomplete', query, None, lambda: self.fetch_predictions(query, session_token)),
+            )
+            if shared:
+                record_stat('autocomplete_coalesced')
+            prefix_cache.insert(query, results)
+            return Response({'results': results})
             
+        except GoogleAPIError as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def fetch_predictions(self, query, session_token=None):
+        """Call the Autocomplete API and return ``(status, results)``"""
+        record_stat('autocomplete_upstream_calls')
+        data = get_google_client().get_json('autocomplete/json', autocomplete_params(query, session_token))
+        return format_predictions(data)
 
 class GooglePlaceDetailsView(APIView):
     permission_classes = []  # Temporarily remove auth for testing
     
     def get(self, request, place_id):
-        url = "https://maps.googleapis.com/maps/api/place/details/json"
-        params = {
-            'place_id': place_id,
-            'key': settings.GOOGLE_PLACES_API_KEY,
-            'fields': 'name,formatted_address,formatted_phone_number,website,rating,user_ratings_total,reviews,photos,opening_hours,url,business_status,types'
-        }
+        # Closing the autocomplete session lets Google bill it as one search
+        session_token = request.GET.get('sessiontoken') or None
+        if session_token:
+            record_stat('completed_searches')
         
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
+            result = get_place_record(place_id, session_token=session_token)
             
-            if data.get('status') == 'OK':
-                result = data.get('result', {})
-                
-                # Process photos
-                photos = []
-                if result.get('photos'):
-                    for photo in result.get('photos', [])[:10]:
-                        photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=800&photoreference={photo.get('photo_reference')}&key={settings.GOOGLE_PLACES_API_KEY}"
-                        photos.append({
-                            'url': photo_url,
-                            'width': photo.get('width'),
-                            'height': photo.get('height')
-                        })
-                
-                # Process reviews
-                reviews = []
-                if result.get('reviews'):
-                    for review in result.get('reviews', [])[:3]:
-                        reviews.append({
-                            'author_name': review.get('author_name'),
-                            'rating': review.get('rating'),
-                            'text': review.get('text'),
-                            'time': review.get('time'),
-                            'profile_photo_url': review.get('profile_photo_url')
-                        })
-                
-                # Process opening hours
-                opening_hours = None
-                if result.get('opening_hours'):
-                    opening_hours = {
-                        'open_now': result.get('opening_hours', {}).get('open_now'),
-                        'weekday_text': result.get('opening_hours', {}).get('weekday_text', [])
-                    }
-                
-                business_data = {
-                    'place_id': place_id,
-                    'name': result.get('name'),
-                    'address': result.get('formatted_address'),
-                    'phone': result.get('formatted_phone_number'),
-                    'website': result.get('website'),
-                    'rating': result.get('rating'),
-                    'user_ratings_total': result.get('user_ratings_total'),
-                    'google_maps_url': result.get('url'),
-                    'business_status': result.get('business_status'),
-                    'types': result.get('types', []),
-                    'photos': photos,
-                    'reviews': reviews,
-                    'opening_hours': opening_hours
-                }
-                
-                return Response(business_data)
+            if result is not None:
+                return Response(format_business_details(
+                    place_id, result, lambda ref: place_photo_url(request, ref)
+                ))
             
             return Response({'error': 'Place not found'}, status=status.HTTP_404_NOT_FOUND)
             
+        except GoogleAPIError as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PlacePhotoView(APIView):
+    permission_classes = []  # Temporarily remove auth for testing
+    
+    def get(self, request, photo_reference):
+        """Serve a place photo thumbnail from the local disk cache"""
+        try:
+            width = int(request.GET.get('w', settings.PLACE_PHOTO_WIDTHS[-1]))
+        except ValueError:
+            width = None
+        if width not in settings.PLACE_PHOTO_WIDTHS:
+            return Response(
+                {'error': f"w must be one of {', '.join(map(str, settings.PLACE_PHOTO_WIDTHS))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            path, digest, content_type = get_photo(photo_reference, width)
+        except PhotoNotFound:
+            return Response({'error': 'Photo not found'}, status=status.HTTP_404_NOT_FOUND)
+        except GoogleAPIError as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        # Thumbnails are named by their content hash, so the digest is a strong ETag
+        etag = f'"{digest}"'
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            try:
+                response = FileResponse(open(path, 'rb'), content_type=content_type)
+            except FileNotFoundError:
+                # Evicted by another request since get_photo() returned
+                return HttpResponse(status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.PLACE_PHOTO_MAX_AGE, immutable=True)
+        return response
+
+class PlacesCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Hit/miss counters for this worker's Places cache"""
+        return Response(get_cache_stats())
\ No newline at end of file
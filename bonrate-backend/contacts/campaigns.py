@@ -0,0 +1,178 @@
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import CampaignEnrollment, CampaignStep, Contact, EmailTemplate
+from .email_service import mark_contacts_sent, send_review_email_batch
+from .utils import batched
+from .rate_limit import acquire_send_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+def enroll_contacts(campaign, contact_ids, start_at=None):
+    """Enroll the campaign owner's contacts, skipping any already enrolled.
+
+    The first step becomes due at ``start_at`` (default now) plus its delay;
+    enrollments in a campaign that is not active start out paused.
+    Returns the number of contacts newly enrolled.
+    """
+    first_step = campaign.steps.order_by('position').first()
+    if first_step is None:
+        raise ValueError("Campaign has no steps")
+
+    run_at = (start_at or timezone.now()) + first_step.delay
+    enrollment_status = 'active' if campaign.status == 'active' else 'paused'
+    contact_ids = Contact.objects.filter(id__in=contact_ids, user=campaign.user_id).values_list('id', flat=True)
+    count = 0
+    for chunk in batched(contact_ids.iterator(), 1000):
+        enrolled = CampaignEnrollment.objects.filter(campaign=campaign, contact_id__in=chunk)
+        before = enrolled.count()
+        CampaignEnrollment.objects.bulk_create(
+            [
+                CampaignEnrollment(campaign=campaign, contact_id=contact_id, status=enrollment_status, next_run_at=run_at)
+                for contact_id in chunk
+            ],
+            ignore_conflicts=True,
+        )
+        count += enrolled.count() - before
+    return count
+
+def sync_enrollment_status(campaign):
+    """Pause or resume the campaign's enrollments to match its status.
+
+    Call in the transaction that saved the status. Paused enrollments fall
+    out of the scheduler's partial index, so a paused campaign costs the
+    scheduler nothing; on resume, steps that fell due meanwhile run at once.
+    """
+    if campaign.status == 'active':
+        return campaign.enrollments.filter(status='paused').update(status='active')
+    return campaign.enrollments.filter(status='active').update(status='paused')
+
+def claim_due_enrollments(batch_size, now=None):
+    """Claim up to ``batch_size`` due enrollments for this worker.
+
+    Due rows come from the partial index on active ``next_run_at``; only
+    enrollments of active campaigns are active. The conditional UPDATE
+    stamps them with a fresh token and pushes ``next_run_at`` out by
+    CAMPAIGN_CLAIM_LEASE, so other workers skip them and a crashed
+    worker's rows become due again when the lease ends.
+    """
+    now = now or timezone.now()
+    due_ids = list(
+        CampaignEnrollment.objects.filter(status='active', next_run_at__lte=now)
+        .order_by('next_run_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not due_ids:
+        return []
+
+    token = uuid.uuid4()
+    CampaignEnrollment.objects.filter(id__in=due_ids, status='active', next_run_at__lte=now).update(
+        claim_token=token,
+        next_run_at=now + timedelta(seconds=settings.CAMPAIGN_CLAIM_LEASE),
+    )
+    return list(
+        CampaignEnrollment.objects.filter(claim_token=token)
+        .select_related('contact', 'campaign__user')
+        .order_by('next_run_at', 'id')
+    )
+
+def _campaign_steps(campaign_ids):
+    steps = defaultdict(list)
+    for step in CampaignStep.objects.filter(campaign_id__in=campaign_ids).order_by('position'):
+        steps[step.campaign_id].append(step)
+    return steps
+
+def _advance(enrollment, steps, now):
+    """Move an enrollment past its current step"""
+    enrollment.next_step += 1
+    enrollment.attempts = 0
+    enrollment.last_run_at = now
+    if enrollment.next_step < len(steps):
+        enrollment.next_run_at = now + steps[enrollment.next_step].delay
+    else:
+        enrollment.status = 'completed'
+        enrollment.next_run_at = None
+
+def process_enrollments(enrollments, now=None):
+    """Send the due step of each claimed enrollment and schedule the next one.
+
+    Emails go out per account and template over one SMTP connection. Steps whose
+    condition no longer holds stop the enrollment; failed sends are retried
+    after CAMPAIGN_RETRY_DELAY up to CAMPAIGN_MAX_ATTEMPTS times, and sends
+    over the rate limit are pushed back until tokens are available.
+    Returns counts of sent, failed, stopped and deferred enrollments.
+    """
+    now = now or timezone.now()
+    steps = _campaign_steps({enrollment.campaign_id for enrollment in enrollments})
+    to_send = defaultdict(list)
+    stats = {'sent': 0, 'failed': 0, 'stopped': 0, 'deferred': 0}
+
+    for enrollment in enrollments:
+        campaign_steps = steps[enrollment.campaign_id]
+        if enrollment.next_step >= len(campaign_steps):
+            # Steps were removed after enrollment
+            enrollment.status = 'completed'
+            enrollment.next_run_at = None
+            continue
+        step = campaign_steps[enrollment.next_step]
+        if step.condition == 'not_completed' and enrollment.contact.review_status == 'completed':
+            enrollment.status = 'stopped'
+            enrollment.next_run_at = None
+            stats['stopped'] += 1
+            continue
+        to_send[(enrollment.campaign.user, step.template_id)].append(enrollment)
+
+    templates = EmailTemplate.objects.in_bulk({template_id for _, template_id in to_send if template_id})
+    for (user, template_id), user_enrollments in to_send.items():
+        granted, retry_after = acquire_send_tokens(user, len(user_enrollments))
+        for enrollment in user_enrollments[granted:]:
+            # Over the send rate limit: try again later without using up an attempt
+            enrollment.next_run_at = now + timedelta(seconds=retry_after)
+            stats['deferred'] += 1
+        user_enrollments = user_enrollments[:granted]
+        if not user_enrollments:
+            continue
+
+        sent, failed = send_review_email_batch(
+            [enrollment.contact for enrollment in user_enrollments], user, template=templates.get(template_id)
+        )
+        mark_contacts_sent(sent)
+        sent_ids = {contact.id for contact in sent}
+        for enrollment in user_enrollments:
+            if enrollment.contact_id in sent_ids:
+                _advance(enrollment, steps[enrollment.campaign_id], now)
+                stats['sent'] += 1
+            else:
+                enrollment.attempts += 1
+                if enrollment.attempts >= settings.CAMPAIGN_MAX_ATTEMPTS:
+                    enrollment.status = 'failed'
+                    enrollment.next_run_at = None
+                else:
+                    enrollment.next_run_at = now + timedelta(seconds=settings.CAMPAIGN_RETRY_DELAY)
+                stats['failed'] += 1
+
+    for enrollment in enrollments:
+        enrollment.claim_token = None
+    with transaction.atomic():
+        CampaignEnrollment.objects.bulk_update(
+            enrollments,
+            ['status', 'next_step', 'next_run_at', 'attempts', 'claim_token', 'last_run_at'],
+            batch_size=500,
+        )
+        # A campaign paused while this batch was in flight keeps its rows paused
+        CampaignEnrollment.objects.filter(
+            id__in=[enrollment.id for enrollment in enrollments], status='active'
+        ).exclude(campaign__status='active').update(status='paused')
+    return stats
+
+def run_due_steps(batch_size=None):
+    """Claim and process one batch of due steps; returns the stats, or None if nothing was due"""
+    batch_size = batch_size or settings.CAMPAIGN_BATCH_SIZE
+    enrollments = claim_due_enrollments(batch_size)
+    if not enrollments:
+        return None
+    return process_enrollments(enrollments)
@@ -0,0 +1,130 @@
+import os
+import socket
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import EmailJob
+from .email_service import send_bulk_review_emails
+from .rate_limit import acquire_send_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LeaseLost(Exception):
+    """The job was handed to another worker after this one's lease expired"""
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def lease_expiry():
+    return timezone.now() + timedelta(seconds=settings.EMAIL_JOB_LEASE_SECONDS)
+
+def enqueue_bulk_email_job(contact_ids, user, run_after=None, template=None):
+    """Persist a bulk review email job for the worker to pick up"""
+    contact_ids = [str(contact_id) for contact_id in dict.fromkeys(contact_ids)]
+    return EmailJob.objects.create(
+        user=user,
+        contact_ids=contact_ids,
+        total_count=len(contact_ids),
+        run_after=run_after,
+        template=template,
+    )
+
+def claim_next_job(worker=None):
+    """Atomically move the oldest queued job to running and return it.
+
+    The conditional UPDATE makes the claim safe when several worker
+    processes poll the same table. The job is leased to ``worker`` (this
+    process by default). Jobs deferred by the rate limiter are skipped
+    until their ``run_after``.
+    """
+    ready = Q(run_after__isnull=True) | Q(run_after__lte=timezone.now())
+    for job_id in EmailJob.objects.filter(ready, status='queued').values_list('id', flat=True)[:10]:
+        claimed = EmailJob.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            claimed_by=worker or worker_name(),
+            lease_expires_at=lease_expiry(),
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return EmailJob.objects.select_related('user', 'template').get(id=job_id)
+    return None
+
+def _owned(job):
+    return EmailJob.objects.filter(id=job.id, status='running', claimed_by=job.claimed_by)
+
+def progress_recorder(job):
+    """``progress`` callback adding one send_bulk_review_emails call's totals to ``job``.
+
+    Each update renews the lease, and raises LeaseLost once the job is no
+    longer this worker's.
+    """
+    recorded = {'processed': 0, 'success_count': 0, 'failed_count': 0}
+
+    def record(**totals):
+        updated = _owned(job).update(
+            processed_count=F('processed_count') + totals['processed'] - recorded['processed'],
+            success_count=F('success_count') + totals['success_count'] - recorded['success_count'],
+            failed_count=F('failed_count') + totals['failed_count'] - recorded['failed_count'],
+            lease_expires_at=lease_expiry(),
+        )
+        if not updated:
+            raise LeaseLost(job.id)
+        recorded.update(totals)
+
+    return record
+
+def run_job(job, chunk_size=None):
+    """Send the job's emails chunk by chunk, recording progress after each email.
+    
+    Each chunk first takes send tokens from the rate limiter. When fewer
+    are granted than the chunk needs, the granted part is sent and the job
+    goes back to the queue with ``run_after`` set, resuming from its
+    progress. Every progress update renews the lease; once the lease is
+    lost to another worker this one stops. Returns the job's new status,
+    or 'lost'.
+    """
+    chunk_size = chunk_size or settings.EMAIL_JOB_CHUNK_SIZE
+    owned = _owned(job)
+    contact_ids = job.contact_ids[job.processed_count:]
+
+    try:
+        for start in range(0, len(contact_ids), chunk_size):
+            chunk = contact_ids[start:start + chunk_size]
+            granted, retry_after = acquire_send_tokens(job.user, len(chunk))
+            if granted:
+                send_bulk_review_emails(chunk[:granted], job.user, template=job.template, progress=progress_recorder(job))
+            if granted < len(chunk):
+                owned.update(
+                    status='queued',
+                    claimed_by='',
+                    lease_expires_at=None,
+                    run_after=timezone.now() + timedelta(seconds=retry_after),
+                )
+                return 'queued'
+    except LeaseLost:
+        logger.warning("Email job %s was requeued while this worker held it; stopping", job.id)
+        return 'lost'
+    except Exception as e:
+        logger.exception("Email job %s failed", job.id)
+        owned.update(
+            status='failed',
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+        return 'failed'
+
+    owned.update(status='completed', finished_at=timezone.now())
+    return 'completed'
+
+def requeue_stale_jobs():
+    """Return jobs whose worker stopped renewing its lease to the queue.
+
+    Jobs a live worker holds are left alone. Progress is kept per email,
+    so the job resumes after the last one recorded.
+    """
+    expired = Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=timezone.now())
+    return EmailJob.objects.filter(expired, status='running').update(
+        status='queued', claimed_by='', lease_expires_at=None,
+    )
@@ -1,101 +1,178 @@
-from django.core.mail import send_mail
+from django.core.mail import get_connection
 from django.conf import settings
+from django.utils import timezone
 from .models import Contact
+from .email_templates import account_template, render_review_emails, review_link
+from .write_buffer import apply_contact_writes, contact_writes
+from .utils import batched
+import smtplib
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_review_email(contact, user):
-    """Send review request email to a single contact using Django send_mail"""
-    business_name = getattr(user, 'business_name', None) or 'Our Business'
-    subject = f"We'd love your feedback - {business_name}"
-    
-    # Use Google review URL if available, otherwise use custom review URL
-    review_link = contact.google_review_url or contact.review_url
-    
-    # Email content
-    if contact.google_review_url:
-        message = f"""
-Hi {contact.name},
-
-Thank you for choosing {business_name}! We hope you had a great experience.
+# Errors that mean the SMTP session itself is gone, so the message is worth
+# retrying on a fresh connection rather than counting as failed.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
 
-We'd really appreciate if you could take a moment to leave us a Google review:
-{review_link}
-
-Click the link above to open our Google Maps page where you can leave a review.
-Your feedback helps us improve and helps other customers make informed decisions.
-
-Thank you!
-{business_name} Team
-        """
-    else:
-        message = f"""
-Hi {contact.name},
+def build_review_email(contact, user, connection=None, template=None):
+    """Build the review request email for a single contact"""
+    return render_review_emails([contact], user, account_template(user, template), connection=connection)[0]
 
-Thank you for choosing {business_name}! We hope you had a great experience.
-
-We'd really appreciate if you could take a moment to leave us a review:
-{review_link}
-
-Your feedback helps us improve and helps other customers make informed decisions.
-
-Thank you!
-{business_name} Team
-        """
+def send_review_email(contact, user):
+    """Send review request email to a single contact on its own connection"""
+    email = build_review_email(contact, user)
     
     try:
-        print(f"=== EMAIL SERVICE DEBUG ===")
-        print(f"Contact: {contact.name} ({contact.email})")
-        print(f"User: {user.email}")
-        print(f"Business name: {business_name}")
-        print(f"Google review URL: {contact.google_review_url}")
-        print(f"Custom review URL: {contact.review_url}")
-        print(f"Using review link: {review_link}")
-        print(f"From email: {settings.DEFAULT_FROM_EMAIL}")
-        print(f"Subject: {subject}")
-        print("\n" + "="*60)
-        print("📧 REVIEW LINK SENT TO USER:")
-        print(review_link)
-        print("="*60 + "\n")
+        logger.debug("Sending review email", extra={
+            'contact_id': str(contact.id),
+            'user_id': user.pk,
+            'subject': email.subject,
+            'review_link': review_link(contact),
+        })
         
-        # For development - simulate email sending
-        print(f"📧 EMAIL WOULD BE SENT:")
-        print(f"To: {contact.email}")
-        print(f"Subject: {subject}")
-        print(f"Message: {message[:100]}...")
-        print("Email sending simulated successfully!")
+        email.send()
         
-        print(f"Email simulated successfully to {contact.email}")
+        logger.info("Review email sent", extra={'contact_id': str(contact.id), 'user_id': user.pk})
         
-        # Update contact status
+        # Written through: the caller reloads the list straight after this returns
         contact.review_status = 'sent'
-        contact.save()
+        mark_contacts_sent([contact], write_through=True)
         
         return True
             
-    except Exception as e:
-        print(f"ERROR: Failed to send email to {contact.email}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Failed to send review email", extra={'contact_id': str(contact.id), 'user_id': user.pk})
         return False
 
-def send_bulk_review_emails(contact_ids, user):
-    """Send review emails to multiple contacts"""
-    contacts = Contact.objects.filter(id__in=contact_ids, user=user)
-    success_count = 0
-    failed_count = 0
+def send_review_email_batch(contacts, user, connection=None, reconnect_attempts=None, template=None, on_result=None):
+    """Send review emails for a batch of contacts over one SMTP connection.
+    
+    Messages are rendered up front from one compiled ``template`` (or the
+    account default). Each message goes through ``connection.send_messages``
+    on the shared connection so a failure is attributed to the right
+    contact. When the session drops, the connection is reopened up to
+    ``reconnect_attempts`` times and the message is retried. Returns
+    ``(sent, failed)`` lists of contacts; the caller is responsible for
+    recording their status. ``on_result(contact, ok)``, if given, is called
+    after each message.
+    """
+    if reconnect_attempts is None:
+        reconnect_attempts = settings.REVIEW_EMAIL_RECONNECT_ATTEMPTS
+    connection = connection or get_connection()
+    sent, failed = [], []
+    reconnects_left = reconnect_attempts
+    
+    try:
+        connection.open()
+    except Exception:
+        logger.exception("Could not open email connection for batch of %d", len(contacts))
+        for contact in contacts:
+            if on_result is not None:
+                on_result(contact, False)
+        return sent, list(contacts)
+    
+    emails = render_review_emails(contacts, user, account_template(user, template), connection=connection)
+    try:
+        for contact, email in zip(contacts, emails):
+            while True:
+                try:
+                    if connection.send_messages([email]):
+                        sent.append(contact)
+                    else:
+                        failed.append(contact)
+                    break
+                except RECONNECT_ERRORS:
+                    if reconnects_left <= 0:
+                        logger.exception("Email connection lost sending to %s", contact.email)
+                        failed.append(contact)
+                        break
+                    reconnects_left -= 1
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        logger.exception("Could not reopen email connection")
+                        failed.append(contact)
+                        break
+                except Exception:
+                    logger.exception("Failed to send review email to %s", contact.email)
+                    failed.append(contact)
+                    break
+            if on_result is not None:
+                on_result(contact, bool(sent) and sent[-1] is contact)
+    finally:
+        connection.close()
+    
+    return sent, failed
+
+def mark_contacts_sent(contacts, write_through=False):
+    """Record sent contacts; returns the count.
+    
+    Queue and campaign batches go through the contact write buffer.
+    ``write_through`` applies the change before returning instead, for
+    interactive sends whose result is read back right away.
+    """
+    if not contacts:
+        return 0
+    if write_through:
+        fields = {'review_status': 'sent', 'last_contact': timezone.now()}
+        apply_contact_writes({str(contact.id): (fields['last_contact'], fields) for contact in contacts})
+    else:
+        contact_writes.record([contact.id for contact in contacts], review_status='sent', last_contact=timezone.now())
+    return len(contacts)
+
+def send_bulk_review_emails(contact_ids, user, batch_size=None, template=None, progress=None):
+    """Send review emails to multiple contacts, one SMTP connection per batch.
+    
+    Contacts are sent in the order of ``contact_ids``. Ids that do not
+    resolve to one of the account's contacts count as failed, so the two
+    counts always add up to the number of distinct ids. ``progress``, if
+    given, is called with the running totals after each contact, so a
+    caller can record how far into ``contact_ids`` it got.
+    """
+    batch_size = batch_size or settings.REVIEW_EMAIL_BATCH_SIZE
+    contact_ids = list(dict.fromkeys(str(contact_id) for contact_id in contact_ids))
+    positions = {contact_id: position for position, contact_id in enumerate(contact_ids)}
+    totals = {'processed': 0, 'success_count': 0, 'failed_count': 0}
+    found_count = 0
+    sent = []
+    
+    def reached(position, ok):
+        # Ids passed over on the way to ``position`` were not found
+        totals['failed_count'] += position - totals['processed'] + (not ok)
+        totals['success_count'] += ok
+        totals['processed'] = position + 1
+        if progress is not None:
+            progress(**totals)
+    
+    def on_result(contact, ok):
+        if ok:
+            sent.append(contact)
+        reached(positions[str(contact.id)], ok)
+    
+    for batch_ids in batched(contact_ids, batch_size):
+        contacts = sorted(
+            Contact.objects.filter(id__in=batch_ids, user=user)
+            .only('id', 'name', 'email', 'google_review_url', 'review_url', 'short_code'),
+            key=lambda contact: positions[str(contact.id)],
+        )
+        found_count += len(contacts)
+        if not contacts:
+            continue
+        try:
+            send_review_email_batch(contacts, user, template=template, on_result=on_result)
+        finally:
+            # Recorded even when ``progress`` stops the batch part way
+            mark_contacts_sent(sent)
+            sent.clear()
     
-    for contact in contacts:
-        if send_review_email(contact, user):
-            success_count += 1
-        else:
-            failed_count += 1
+    if found_count < len(contact_ids):
+        logger.warning("%d of %d contact(s) not found for bulk send", len(contact_ids) - found_count, len(contact_ids))
+    if totals['processed'] < len(contact_ids):
+        reached(len(contact_ids) - 1, False)
     
     return {
-        'success_count': success_count,
-        'failed_count': failed_count,
-        'total_sent': success_count
-    }
\ No newline at end of file
+        'success_count': totals['success_count'],
+        'failed_count': totals['failed_count'],
+        'total_sent': totals['success_count']
+    }
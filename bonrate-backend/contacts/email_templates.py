@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+from string import Formatter
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.utils.html import escape, linebreaks
+from .models import EmailTemplate
+
+# Placeholders a template may use, written {name} as in the template editor
+TEMPLATE_VARIABLES = ('customer_name', 'first_name', 'business_name', 'review_link')
+
+# Used when the account has no default template of its own
+BUILTIN_TEMPLATES = {
+    'google': (
+        "We'd love your feedback - {business_name}",
+        """Hi {customer_name},
+
+Thank you for choosing {business_name}! We hope you had a great experience.
+
+We'd really appreciate if you could take a moment to leave us a Google review:
+{review_link}
+
+Click the link above to open our Google Maps page where you can leave a review.
+Your feedback helps us improve and helps other customers make informed decisions.
+
+Thank you!
+{business_name} Team""",
+    ),
+    'custom': (
+        "We'd love your feedback - {business_name}",
+        """Hi {customer_name},
+
+Thank you for choosing {business_name}! We hope you had a great experience.
+
+We'd really appreciate if you could take a moment to leave us a review:
+{review_link}
+
+Your feedback helps us improve and helps other customers make informed decisions.
+
+Thank you!
+{business_name} Team""",
+    ),
+}
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+def _parse(source):
+    """Yield ``(literal, variable)`` pairs, rejecting unknown or formatted placeholders"""
+    try:
+        parsed = list(Formatter().parse(source))
+    except ValueError as e:
+        raise TemplateSyntaxError(f"{e}; write {{{{ and }}}} for literal braces") from e
+    for literal, field, spec, conversion in parsed:
+        if field is not None:
+            if field not in TEMPLATE_VARIABLES:
+                raise TemplateSyntaxError(
+                    f"Unknown variable {{{field}}}; use one of {', '.join(TEMPLATE_VARIABLES)}"
+                )
+            if spec or conversion:
+                raise TemplateSyntaxError(f"Formatting is not supported in {{{field}}}")
+        yield literal, field
+
+def _format_string(source, escape_literal=str):
+    """Rebuild ``source`` as a str.format string with only known placeholders"""
+    parts = []
+    for literal, field in _parse(source):
+        parts.append(escape_literal(literal).replace('{', '{{').replace('}', '}}'))
+        if field is not None:
+            parts.append('{' + field + '}')
+    return ''.join(parts)
+
+class CompiledTemplate:
+    """A template reduced to three ``str.format`` strings.
+
+    The HTML version is escaped and paragraph-formatted once at compile
+    time, so rendering a message is three ``format_map`` calls.
+    """
+    __slots__ = ('subject', 'text', 'html')
+
+    def __init__(self, subject, body):
+        subject_format = _format_string(subject)
+        if '\n' in subject_format:
+            raise TemplateSyntaxError("The subject must be a single line")
+        self.subject = subject_format
+        self.text = _format_string(body.strip())
+        self.html = linebreaks(_format_string(body.strip(), escape))
+
+    def render(self, context):
+        """Return ``(subject, text, html)`` for one recipient's variables"""
+        html_context = {name: escape(value) for name, value in context.items()}
+        link = html_context['review_link']
+        html_context['review_link'] = f'<a href="{link}">{link}</a>'
+        return (
+            self.subject.format_map(context),
+            self.text.format_map(context),
+            self.html.format_map(html_context),
+        )
+
+def compile_template(subject, body):
+    """Validate and compile a subject/body pair; raises TemplateSyntaxError"""
+    return CompiledTemplate(subject, body)
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+_builtin = {name: compile_template(*source) for name, source in BUILTIN_TEMPLATES.items()}
+
+def get_compiled_template(template):
+    """Compile a stored EmailTemplate once per (id, version) in this process"""
+    key = (template.pk, template.version)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+
+    compiled = compile_template(template.subject, template.body)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > settings.EMAIL_TEMPLATE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+def account_template(user, template=None):
+    """Compiled template for a send: ``template``, else the account default.
+
+    Returns None when neither exists, meaning the built-in templates apply.
+    """
+    if template is None and user.pk is not None:
+        template = EmailTemplate.objects.filter(user=user, is_default=True).first()
+    return get_compiled_template(template) if template is not None else None
+
+def review_link(contact):
+    """The link a review email carries for ``contact``"""
+    # The short link redirects to Google and records the click
+    return contact.review_url or contact.google_review_url or ''
+
+def template_context(contact, business_name):
+    name = contact.name or ''
+    return {
+        'customer_name': name,
+        'first_name': name.split(' ', 1)[0],
+        'business_name': business_name,
+        'review_link': review_link(contact),
+    }
+
+def render_review_emails(contacts, user, compiled=None, connection=None):
+    """Render one review email per contact with a single compiled template.
+
+    With no ``compiled`` template each contact gets the built-in one that
+    fits whether it has a Google review link.
+    """
+    business_name = getattr(user, 'business_name', None) or 'Our Business'
+    emails = []
+    for contact in contacts:
+        template = compiled or _builtin['google' if contact.google_review_url else 'custom']
+        subject, text, html = template.render(template_context(contact, business_name))
+        email = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, [contact.email], connection=connection)
+        if contact.short_code:
+            # HTML part carries the open-tracking pixel
+            pixel_url = escape(f"{settings.REVIEW_LINK_BASE_URL}/t/o/{contact.short_code}.gif")
+            html += f'<img src="{pixel_url}" width="1" height="1" alt="" style="display:block;border:0">'
+        email.attach_alternative(html, 'text/html')
+        emails.append(email)
+    return emails
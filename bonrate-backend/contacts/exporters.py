@@ -0,0 +1,38 @@
+import csv
+import re
+from django.conf import settings
+
+EXPORT_COLUMNS = [
+    'name', 'phone', 'email', 'business_name', 'business_place_id', 'business_address',
+    'review_status', 'google_review_url', 'review_url', 'last_contact', 'created_at',
+]
+
+# Leading characters a spreadsheet would read as the start of a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Signed numbers and phone numbers such as +1 555 0100 are left as they are
+NUMBER_LIKE = re.compile(r'[+-]?[\d\s().-]+')
+
+class Echo:
+    """File-like object whose write() hands the row back instead of buffering it"""
+    def write(self, value):
+        return value
+
+def _cell(value):
+    """Quote text that would otherwise be evaluated as a formula when opened"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not NUMBER_LIKE.fullmatch(value):
+        return "'" + value
+    return value
+
+def iter_contacts_csv(queryset, chunk_size=None):
+    """Yield CSV lines for ``queryset`` one row at a time.
+    
+    Rows come from ``values_list`` through ``iterator()``, so no model
+    instances or full result list are held in memory. Text cells that
+    start like a formula, other than numbers, are prefixed with ``'``.
+    """
+    chunk_size = chunk_size or settings.CONTACT_EXPORT_CHUNK_SIZE
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    rows = queryset.order_by('-created_at', '-id').values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
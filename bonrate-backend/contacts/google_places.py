@@ -1,81 +1,116 @@
-import requests
 from django.conf import settings
+from .http_client import get_google_client
+from .places_cache import cached_search, cached_record
+import logging
 
-def get_place_details(place_id):
-    """Get detailed place information including review URL"""
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
+logger = logging.getLogger(__name__)
+
+# Superset of the fields any view needs, fetched once per place and cached;
+# each caller projects its own subset out of the cached record.
+PLACE_DETAILS_FIELDS = ','.join([
+    'name', 'formatted_address', 'formatted_phone_number', 'website', 'rating',
+    'user_ratings_total', 'reviews', 'photos', 'opening_hours', 'url',
+    'business_status', 'types',
+])
+
+def get_place_record(place_id, session_token=None):
+    """Return the cached raw Places details result for a place, or None if not found.
     
+    ``session_token`` is only sent upstream when the record has to be
+    fetched. Network errors propagate to the caller.
+    """
+    return cached_record(
+        'details',
+        place_id,
+        lambda: fetch_place_record(place_id, session_token),
+        fresh_ttl=settings.GOOGLE_PLACE_DETAILS_FRESH_TTL,
+        stale_ttl=settings.GOOGLE_PLACE_DETAILS_STALE_TTL,
+        negative_ttl=settings.GOOGLE_PLACES_NEGATIVE_CACHE_TTL,
+    )
+
+def place_details_params(place_id, session_token=None):
     params = {
         'place_id': place_id,
         'key': settings.GOOGLE_PLACES_API_KEY,
-        'fields': 'name,formatted_address,rating,user_ratings_total,url,website'
+        'fields': PLACE_DETAILS_FIELDS
     }
-    
+    if session_token:
+        params['sessiontoken'] = session_token
+    return params
+
+def format_place_record(data):
+    """Turn a Place Details response into ``(status, result)``"""
+    if data.get('status') != 'OK':
+        logger.warning("Google Places Details API error: %s", data.get('status'))
+    return data.get('status'), data.get('result', {})
+
+def fetch_place_record(place_id, session_token=None):
+    """Call the Place Details API and return ``(status, result)``"""
+    data = get_google_client().get_json('details/json', place_details_params(place_id, session_token))
+    return format_place_record(data)
+
+def get_place_details(place_id):
+    """Get detailed place information including review URL"""
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data.get('status') == 'OK':
-            result = data.get('result', {})
-            return {
-                'name': result.get('name'),
-                'formatted_address': result.get('formatted_address'),
-                'rating': result.get('rating'),
-                'user_ratings_total': result.get('user_ratings_total'),
-                'google_maps_url': result.get('url'),  # This is the Google Maps URL
-                'website': result.get('website')
-            }
-        else:
-            print(f"Google Places Details API error: {data.get('status')}")
-            return None
-            
+        result = get_place_record(place_id)
     except Exception as e:
-        print(f"Error getting place details: {e}")
+        logger.warning("Error getting place details: %s", e)
+        return None
+    
+    if result is None:
         return None
+    
+    return {
+        'name': result.get('name'),
+        'formatted_address': result.get('formatted_address'),
+        'rating': result.get('rating'),
+        'user_ratings_total': result.get('user_ratings_total'),
+        'google_maps_url': result.get('url'),  # This is the Google Maps URL
+        'website': result.get('website')
+    }
 
 def search_places(query, location=None):
     """Search for places using Google Places API with name + location"""
     if not query.strip():
         return []
     
-    # Google Places API endpoint
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    
+    return cached_search('textsearch', query, location, lambda: _fetch_text_search(query, location))
+
+def text_search_params(query, location=None):
     # Combine query with location if provided
     search_query = query
     if location and location.strip():
         search_query = f"{query} in {location}"
     
-    params = {
+    return {
         'query': search_query,
         'key': settings.GOOGLE_PLACES_API_KEY,
         'type': 'establishment'
     }
+
+def format_text_search(data):
+    """Turn a Text Search response into ``(status, results)``"""
+    if data.get('status') == 'OK':
+        results = []
+        for place in data.get('results', [])[:15]:  # Show up to 15 locations for franchises
+            results.append({
+                'place_id': place.get('place_id'),
+                'name': place.get('name'),
+                'formatted_address': place.get('formatted_address'),
+                'rating': place.get('rating'),
+                'user_ratings_total': place.get('user_ratings_total'),
+                'review_url': f"https://search.google.com/local/writereview?placeid={place.get('place_id')}"
+            })
+        return 'OK', results
     
+    logger.warning("Google Places API error: %s", data.get('status'))
+    return data.get('status'), []
+
+def _fetch_text_search(query, location=None):
+    """Call the Text Search API and return ``(status, results)``"""
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data.get('status') == 'OK':
-            results = []
-            for place in data.get('results', [])[:15]:  # Show up to 15 locations for franchises
-                results.append({
-                    'place_id': place.get('place_id'),
-                    'name': place.get('name'),
-                    'formatted_address': place.get('formatted_address'),
-                    'rating': place.get('rating'),
-                    'user_ratings_total': place.get('user_ratings_total'),
-                    'review_url': f"https://search.google.com/local/writereview?placeid={place.get('place_id')}"
-                })
-            return results
-        else:
-            print(f"Google Places API error: {data.get('status')}")
-            return []
-            
+        data = get_google_client().get_json('textsearch/json', text_search_params(query, location))
+        return format_text_search(data)
     except Exception as e:
-        print(f"Error searching places: {e}")
-        return []
\ No newline at end of file
+        logger.warning("Error searching places: %s", e)
+        return 'ERROR', []
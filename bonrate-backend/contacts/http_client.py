@@ -0,0 +1,278 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Places API statuses that mean "try again later" rather than a bad request
+RETRYABLE_API_STATUSES = ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+RETRYABLE_HTTP_STATUSES = (429, 500, 502, 503, 504)
+
+class GoogleAPIError(Exception):
+    """The Google API could not be reached or kept failing after retries"""
+
+class CircuitOpenError(GoogleAPIError):
+    """Calls are being short-circuited while the upstream is degraded"""
+
+class _RetryableResponse(Exception):
+    pass
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures, fail fast for
+    ``reset_timeout`` seconds, then let a single trial call through."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow_request(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Google API circuit opened after %d failures", self.failures)
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another trial through after one ended without a verdict, e.g. cancelled"""
+        with self.lock:
+            self.trial_in_flight = False
+
+class GoogleAPIClient:
+    """Keep-alive HTTP session for Google APIs with timeouts, jittered
+    retries and a circuit breaker.
+
+    ``max_retries`` bounds the retries of a single call and ``deadline``
+    its total time including backoff: no retry starts past the deadline,
+    and each attempt's timeouts are capped at the time left. The read
+    timeout applies per socket read, so a body that keeps trickling in can
+    still run over.
+    """
+
+    def __init__(self, base_url, connect_timeout, read_timeout, max_retries, backoff,
+                 deadline, pool_size, breaker):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.breaker = breaker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get_json(self, path, params):
+        """GET ``base_url/path`` and return the decoded JSON body"""
+        return self._get(path, params, self._decode_json)
+
+    def get_bytes(self, path, params):
+        """GET ``base_url/path`` and return ``(content, content_type)``, following redirects"""
+        return self._get(path, params, lambda response: (response.content, response.headers.get('Content-Type', '')))
+
+    def _decode_json(self, response):
+        data = response.json()
+        if data.get('status') in RETRYABLE_API_STATUSES:
+            raise _RetryableResponse(data.get('status'))
+        return data
+
+    def _get(self, path, params, decode):
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Google API temporarily unavailable")
+        try:
+            return self._get_with_retries(path, params, decode)
+        except GoogleAPIError:
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+
+    def _get_with_retries(self, path, params, decode):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+                if response.status_code in RETRYABLE_HTTP_STATUSES:
+                    raise _RetryableResponse(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                result = decode(response)
+                self.breaker.record_success()
+                return result
+            except (requests.ConnectionError, requests.Timeout, _RetryableResponse) as e:
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                elapsed = time.monotonic() - started
+                if attempt >= self.max_retries or elapsed + delay >= self.deadline:
+                    self.breaker.record_failure()
+                    raise GoogleAPIError(f"Google API request failed after {attempt + 1} attempt(s): {e}") from e
+                attempt += 1
+                time.sleep(delay)
+            except (requests.RequestException, ValueError) as e:
+                # 4xx and undecodable bodies will not improve with a retry
+                self.breaker.record_success()
+                raise GoogleAPIError(f"Google API request failed: {e}") from e
+
+class AsyncGoogleAPIClient:
+    """asyncio counterpart of GoogleAPIClient for the async views.
+
+    Uses an httpx.AsyncClient with the same timeouts, retry policy and
+    circuit breaker, so sync and async callers share one view of upstream
+    health. Here each attempt is also cut off at the deadline, so a call
+    never runs past it.
+    """
+
+    def __init__(self, base_url, connect_timeout, read_timeout, max_retries, backoff,
+                 deadline, pool_size, breaker):
+        import httpx
+
+        self.httpx = httpx
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.breaker = breaker
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size * 4, max_keepalive_connections=pool_size),
+        )
+
+    async def get_json(self, path, params):
+        """GET ``base_url/path`` and return the decoded JSON body"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Google API temporarily unavailable")
+        try:
+            return await self._get_json_with_retries(path, params)
+        except GoogleAPIError:
+            raise
+        except BaseException:
+            # Cancelled, typically because the client went away
+            self.breaker.release_trial()
+            raise
+
+    async def _get_json_with_retries(self, path, params):
+        httpx = self.httpx
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                response = await asyncio.wait_for(self.client.get(url, params=params), remaining)
+                if response.status_code in RETRYABLE_HTTP_STATUSES:
+                    raise _RetryableResponse(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                data = response.json()
+                if data.get('status') in RETRYABLE_API_STATUSES:
+                    raise _RetryableResponse(data.get('status'))
+                self.breaker.record_success()
+                return data
+            except (httpx.TransportError, TimeoutError, _RetryableResponse) as e:
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                elapsed = time.monotonic() - started
+                if attempt >= self.max_retries or elapsed + delay >= self.deadline:
+                    self.breaker.record_failure()
+                    raise GoogleAPIError(f"Google API request failed after {attempt + 1} attempt(s): {e}") from e
+                attempt += 1
+                await asyncio.sleep(delay)
+            except (httpx.HTTPError, ValueError) as e:
+                self.breaker.record_success()
+                raise GoogleAPIError(f"Google API request failed: {e}") from e
+
+def _client_options():
+    return dict(
+        base_url=settings.GOOGLE_PLACES_BASE_URL,
+        connect_timeout=settings.GOOGLE_API_CONNECT_TIMEOUT,
+        read_timeout=settings.GOOGLE_API_READ_TIMEOUT,
+        max_retries=settings.GOOGLE_API_MAX_RETRIES,
+        backoff=settings.GOOGLE_API_RETRY_BACKOFF,
+        deadline=settings.GOOGLE_API_DEADLINE,
+        pool_size=settings.GOOGLE_API_POOL_SIZE,
+        breaker=get_circuit_breaker(),
+    )
+
+_breaker = None
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+def get_circuit_breaker():
+    """Return the process-wide breaker shared by the sync and async clients"""
+    global _breaker
+    with _client_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                settings.GOOGLE_API_BREAKER_THRESHOLD,
+                settings.GOOGLE_API_BREAKER_RESET_TIMEOUT,
+            )
+        return _breaker
+
+def get_google_client():
+    """Return the process-wide Google API client, building it on first use"""
+    global _client
+    if _client is None:
+        options = _client_options()
+        with _client_lock:
+            if _client is None:
+                _client = GoogleAPIClient(**options)
+    return _client
+
+def get_async_google_client():
+    """Return the async client for the running event loop.
+
+    httpx connections belong to the loop that opened them, so each loop
+    (one per ASGI worker) gets its own client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncGoogleAPIClient(**_client_options())
+    return client
+
+def reset_google_client():
+    """Drop the shared clients and breaker so the next call picks up current settings"""
+    global _breaker, _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        _breaker = None
+        _async_clients.clear()
@@ -0,0 +1,134 @@
+import csv
+import io
+from django.conf import settings
+from django.db import transaction
+from .models import Contact
+from .serializers import ContactImportRowSerializer
+from .utils import batched
+from .review_stats import record_status_changes
+
+IMPORT_FIELDS = ContactImportRowSerializer.Meta.fields
+
+class ImportFormatError(Exception):
+    pass
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+def _clean_row(header, values):
+    row = {}
+    for key, value in zip(header, values):
+        if key in IMPORT_FIELDS:
+            row[key] = '' if value is None else str(value).strip()
+    return row
+
+def iter_csv_rows(uploaded_file):
+    """Yield ``(row_number, row_dict)`` from a CSV upload without reading it all into memory"""
+    stream = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+    try:
+        header = [_normalize_header(value) for value in next(reader)]
+        for row_number, values in enumerate(reader, start=2):
+            if any(values):
+                yield row_number, _clean_row(header, values)
+    except StopIteration:
+        return
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Could not read CSV file: {e}")
+    finally:
+        stream.detach()
+
+def iter_xlsx_rows(uploaded_file):
+    """Yield ``(row_number, row_dict)`` from the first sheet of an XLSX upload"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("XLSX import requires openpyxl to be installed")
+    
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Could not read XLSX file: {e}")
+    
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(value) for value in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, _clean_row(header, values)
+    finally:
+        workbook.close()
+
+def iter_import_rows(uploaded_file):
+    name = (uploaded_file.name or '').lower()
+    if name.endswith('.xlsx'):
+        return iter_xlsx_rows(uploaded_file)
+    if name.endswith('.csv') or name.endswith('.txt'):
+        return iter_csv_rows(uploaded_file)
+    raise ImportFormatError("Unsupported file type. Upload a .csv or .xlsx file.")
+
+def import_contacts(user, rows, chunk_size=None):
+    """Validate, dedupe and insert contacts chunk by chunk.
+    
+    Each chunk costs one query to find emails the account already has and
+    one bulk INSERT, so memory and query count stay proportional to the
+    chunk, not the file. Returns a report with a per-row error list.
+    """
+    chunk_size = chunk_size or settings.CONTACT_IMPORT_CHUNK_SIZE
+    report = {
+        'total_rows': 0,
+        'created': 0,
+        'duplicates': 0,
+        'errors': [],
+    }
+    
+    try:
+        for chunk in batched(rows, chunk_size):
+            report['total_rows'] += len(chunk)
+            report['created'] += _import_chunk(user, chunk, report)
+    except ImportFormatError as e:
+        # Earlier chunks are already saved; report how far the import got
+        report['error'] = str(e)
+    
+    report['error_count'] = len(report['errors'])
+    return report
+
+def _import_chunk(user, chunk, report):
+    valid = []
+    for row_number, row in chunk:
+        serializer = ContactImportRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((row_number, serializer.validated_data))
+        else:
+            report['errors'].append({'row': row_number, 'errors': serializer.errors})
+    
+    emails = {data['email'] for _, data in valid}
+    existing = set(
+        Contact.objects.filter(user=user, email__in=emails).values_list('email', flat=True)
+    )
+    
+    new_contacts = []
+    for row_number, data in valid:
+        if data['email'] in existing:
+            report['duplicates'] += 1
+            report['errors'].append({
+                'row': row_number,
+                'errors': {'email': ["A contact with this email already exists."]}
+            })
+            continue
+        # Later rows in the same chunk with this email are duplicates too
+        existing.add(data['email'])
+        contact = Contact(user=user, **data)
+        contact.populate_review_urls()
+        new_contacts.append(contact)
+    
+    with transaction.atomic():
+        Contact.objects.bulk_create(new_contacts, ignore_conflicts=True)
+        # bulk_create skips post_save; rows lost to a conflict are not in the table
+        created = list(
+            Contact.objects.filter(pk__in=[contact.pk for contact in new_contacts]).values_list('review_status', flat=True)
+        )
+        record_status_changes([(user.pk, None, status) for status in created])
+    # A conflict here means the email was added concurrently since the check above
+    report['duplicates'] += len(new_contacts) - len(created)
+    return len(created)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from contacts.models import Contact
+
+
+class Command(BaseCommand):
+    help = "Generate missing review links for contacts in batches, without per-row save()"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Contacts read and bulk-updated per batch")
+        parser.add_argument('--force', action='store_true',
+                            help="Rebuild links that are already set, e.g. after a place_id change")
+        parser.add_argument('--user', type=int, default=None,
+                            help="Only backfill contacts owned by this user id")
+        parser.add_argument('--place-id', default=None,
+                            help="Only backfill contacts of this business place_id")
+
+    def handle(self, *args, **options):
+        queryset = Contact.objects.all()
+        if options['user'] is not None:
+            queryset = queryset.filter(user_id=options['user'])
+        if options['place_id']:
+            queryset = queryset.filter(business_place_id=options['place_id'])
+
+        def progress(scanned, updated):
+            self.stdout.write(f"Scanned {scanned}, updated {updated}")
+
+        scanned, updated = queryset.backfill_review_links(
+            batch_size=options['batch_size'],
+            force=options['force'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} of {scanned} contact(s) updated"))
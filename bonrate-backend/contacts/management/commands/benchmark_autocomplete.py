@@ -0,0 +1,65 @@
+import random
+from django.core.management.base import BaseCommand
+from contacts.autocomplete import PrefixCache, matches_prefix
+
+WORDS = [
+    "joe's", 'pizza', 'bella', 'cafe', 'sushi', 'garden', 'dental', 'auto', 'repair', 'salon',
+    'bistro', 'bakery', 'fitness', 'studio', 'golden', 'dragon', 'taco', 'house', 'grill', 'spa',
+    'family', 'clinic', 'corner', 'market', 'express', 'royal', 'thai', 'kitchen', 'burger', 'barber',
+]
+
+
+class Command(BaseCommand):
+    help = "Replay typed searches to measure upstream autocomplete calls per completed search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=500, help="Completed searches to replay")
+        parser.add_argument('--places', type=int, default=2000, help="Size of the fake place corpus")
+        parser.add_argument('--min-length', type=int, default=3, help="Characters typed before the first request")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        corpus = [
+            {'description': f"{' '.join(rng.sample(WORDS, rng.randint(2, 3)))}, {rng.randint(1, 999)} Main St"}
+            for _ in range(options['places'])
+        ]
+
+        def upstream(text):
+            tokens = text.lower().split()
+            return [place for place in corpus if matches_prefix(place, tokens)][:5]
+
+        # Every search types out the name of a real place, one keystroke at a time
+        targets = [rng.choice(corpus)['description'].split(',')[0] for _ in range(options['searches'])]
+        keystrokes = [
+            target[:length]
+            for target in targets
+            for length in range(options['min_length'], len(target) + 1)
+            if not target[:length].endswith(' ')
+        ]
+
+        cache = PrefixCache(max_entries=10000, ttl=3600, min_prefix_length=options['min_length'])
+        upstream_calls = exact_hits = prefix_hits = wrong_answers = 0
+        for text in keystrokes:
+            results, exact = cache.lookup(text)
+            if results is not None:
+                if exact:
+                    exact_hits += 1
+                else:
+                    prefix_hits += 1
+                    # A local answer must be what upstream would have said
+                    if results != upstream(text):
+                        wrong_answers += 1
+                continue
+            upstream_calls += 1
+            cache.insert(text, upstream(text))
+
+        searches = options['searches']
+        self.stdout.write(f"Searches: {searches}, keystroke requests: {len(keystrokes)}")
+        self.stdout.write(f"Without cache: {len(keystrokes) / searches:.2f} upstream calls per search")
+        self.stdout.write(
+            f"With prefix cache: {upstream_calls / searches:.2f} upstream calls per search "
+            f"({exact_hits} exact hits, {prefix_hits} prefix hits)"
+        )
+        self.stdout.write(f"Reduction: {100 * (1 - upstream_calls / len(keystrokes)):.1f}%")
+        self.stdout.write(f"Prefix hits that differ from upstream: {wrong_answers}")
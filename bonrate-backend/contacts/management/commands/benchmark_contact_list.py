@@ -0,0 +1,64 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from contacts.models import Contact, User
+from contacts.renderers import FastJSONRenderer, orjson
+from contacts.serializers import ContactSerializer, compile_representation
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer and the values() fast path for contact lists on a generated fixture"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Contacts in the fixture")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per path; the best is reported")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        # The fixture is written inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            user = User.objects.create_user(email=f"list-benchmark-{uuid.uuid4().hex[:12]}@example.invalid")
+            Contact.objects.bulk_create([
+                Contact(
+                    user=user, name=f"Customer {i}", phone='555-0100', email=f"customer{i}@example.com",
+                    business_name='Benchmark Bistro', business_place_id='ChIJbenchmark',
+                    business_address='1 Main St', review_url=f"https://bonrate.pro/r/{i:08d}",
+                    google_review_url='https://search.google.com/local/writereview?placeid=ChIJbenchmark',
+                )
+                for i in range(rows)
+            ], batch_size=1000)
+            queryset = Contact.objects.filter(user=user).order_by('-created_at', '-id')
+            represent = compile_representation(ContactSerializer)
+
+            def model_serializer():
+                contacts = list(queryset)
+                data = ContactSerializer(contacts, many=True).data
+                return JSONRenderer().render(data)
+
+            def fast_path():
+                values = queryset.values(*ContactSerializer.Meta.fields)
+                data = [represent(row) for row in values]
+                return FastJSONRenderer().render(data)
+
+            results = {}
+            for label, path in (("ModelSerializer + JSONRenderer", model_serializer),
+                                ("values() + compiled mapping + FastJSONRenderer", fast_path)):
+                best = None
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    body = path()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[label] = (best, body)
+            transaction.set_rollback(True)
+
+        (slow_label, (slow, slow_body)), (fast_label, (fast, fast_body)) = results.items()
+        if slow_body != fast_body:
+            raise CommandError("The fast path's output differs from ContactSerializer's")
+
+        self.stdout.write(f"Rows: {rows}, best of {repeat}, orjson {'installed' if orjson else 'not installed'}")
+        self.stdout.write(f"{slow_label + ':':48} {slow * 1000:8.1f} ms, {rows / slow:,.0f} rows/s")
+        self.stdout.write(f"{fast_label + ':':48} {fast * 1000:8.1f} ms, {rows / fast:,.0f} rows/s")
+        self.stdout.write(f"Speedup: {slow / fast:.1f}x, identical output ({len(fast_body):,} bytes)")
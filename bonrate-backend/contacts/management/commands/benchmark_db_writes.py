@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.core.management.base import BaseCommand
+from contacts.models import Contact, User
+
+
+def benchmark_email():
+    # Contacts are unique per (user, email)
+    return f"{uuid.uuid4().hex}@example.com"
+
+
+def describe_database():
+    """One line describing the active backend and its write-related settings"""
+    db = settings.DATABASES['default']
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}.get(cursor.fetchone()[0])
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        transaction_mode = db.get('OPTIONS', {}).get('transaction_mode', 'DEFERRED')
+        return (f"sqlite {db['NAME']}: journal_mode={journal_mode} synchronous={synchronous} "
+                f"busy_timeout={busy_timeout}ms transactions={transaction_mode}")
+    pool = db.get('OPTIONS', {}).get('pool')
+    return (f"{connection.vendor} {db['NAME']}: CONN_MAX_AGE={db['CONN_MAX_AGE']} "
+            f"health_checks={db['CONN_HEALTH_CHECKS']} pool={pool or 'off'}")
+
+
+class Command(BaseCommand):
+    help = "Measure contact write throughput against the configured database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Contacts written per phase")
+        parser.add_argument('--threads', type=int, default=4, help="Concurrent writers in the contended phase")
+        parser.add_argument('--batch-size', type=int, default=200, help="Contacts per bulk_create")
+
+    def handle(self, *args, **options):
+        rows, threads, batch_size = options['rows'], options['threads'], options['batch_size']
+        self.stdout.write(describe_database())
+
+        user = User.objects.create_user(email=f"db-benchmark-{uuid.uuid4().hex[:12]}@example.invalid")
+        try:
+            results = [
+                ("Single-row commits", self.run_phase(user, rows, 1, self.write_rows)),
+                (f"Single-row commits, {threads} threads", self.run_phase(user, rows, threads, self.write_rows)),
+                (f"Transactions of {batch_size}, {threads} threads",
+                 self.run_phase(user, rows, threads, lambda *a: self.write_batches(*a, batch_size))),
+            ]
+        finally:
+            Contact.objects.filter(user=user).delete()
+            user.delete()
+
+        for label, (elapsed, written, locked) in results:
+            self.stdout.write(
+                f"{label + ':':42} {written} rows in {elapsed:.2f}s, {written / elapsed:,.0f} rows/s, "
+                f"{locked} 'database is locked' errors"
+            )
+
+    def run_phase(self, user, rows, threads, writer):
+        """Split ``rows`` across ``threads`` writers; returns (seconds, rows written, lock errors)"""
+        counts = [[0, 0] for _ in range(threads)]
+        per_thread = rows // threads
+
+        def run(index):
+            try:
+                writer(user, per_thread, counts[index])
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        return elapsed, sum(written for written, _ in counts), sum(locked for _, locked in counts)
+
+    def write_rows(self, user, count, counts):
+        for i in range(count):
+            try:
+                Contact.objects.create(user=user, name=f"Benchmark {i}", phone='555-0100', email=benchmark_email())
+                counts[0] += 1
+            except OperationalError:
+                counts[1] += 1
+
+    def write_batches(self, user, count, counts, batch_size):
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            try:
+                with transaction.atomic():
+                    Contact.objects.bulk_create([
+                        Contact(user=user, name=f"Benchmark {start + i}", phone='555-0100', email=benchmark_email())
+                        for i in range(size)
+                    ])
+                counts[0] += size
+            except OperationalError:
+                counts[1] += 1
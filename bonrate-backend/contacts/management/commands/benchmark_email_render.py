@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand
+from contacts.models import Contact, EmailTemplate, User
+from contacts.email_templates import compile_template, get_compiled_template, render_review_emails, template_context
+
+SUBJECT = "{first_name}, how was your visit to {business_name}?"
+BODY = """Hi {customer_name}!
+
+Thanks for choosing {business_name}. We'd love to hear about your experience.
+
+Could you take 30 seconds to leave us a review?
+{review_link}
+
+- {business_name} Team"""
+
+
+class Command(BaseCommand):
+    help = "Measure review email rendering throughput with compiled, cached templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Personalized messages rendered per path")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        user = User(business_name='Benchmark Bistro & Bar', email='owner@example.com')
+        contacts = [
+            Contact(name=f"Customer {i} <O'Brien>", phone='555-0100', email=f"customer{i}@example.com",
+                    short_code=f"{i:08d}", review_url=f"https://bonrate.pro/r/{i:08d}",
+                    google_review_url='https://search.google.com/local/writereview?placeid=bench')
+            for i in range(count)
+        ]
+        template = EmailTemplate(pk=1, version=1, user=user, name='Benchmark', subject=SUBJECT, body=BODY)
+
+        def timed(label, fn):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label:<44} {elapsed:7.3f}s  {count / elapsed:10,.0f} msg/s")
+
+        def compile_each_time():
+            for contact in contacts:
+                compile_template(SUBJECT, BODY).render(template_context(contact, user.business_name))
+
+        def cached_render():
+            for contact in contacts:
+                get_compiled_template(template).render(template_context(contact, user.business_name))
+
+        compiled = get_compiled_template(template)
+        self.stdout.write(f"Rendering {count:,} personalized messages (subject, text and HTML)")
+        timed("Compile per message", compile_each_time)
+        timed("Cached by (id, version)", cached_render)
+        timed("Batch render to EmailMultiAlternatives", lambda: render_review_emails(contacts, user, compiled))
+        emails = render_review_emails(contacts, user, compiled)
+        timed("MIME serialization of the batch", lambda: [email.message().as_bytes() for email in emails])
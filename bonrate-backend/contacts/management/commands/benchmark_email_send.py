@@ -0,0 +1,82 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from contacts.models import Contact, User
+from contacts.email_service import build_review_email, send_review_email_batch
+
+
+class SlowHandshakeSink:
+    """aiosmtpd handler that discards mail and delays EHLO to mimic TLS setup"""
+
+    def __init__(self, handshake_delay):
+        self.handshake_delay = handshake_delay
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.handshake_delay)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 OK'
+
+
+class Command(BaseCommand):
+    help = "Compare per-message and pooled SMTP sending against a local aiosmtpd server"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help="Messages sent per path")
+        parser.add_argument('--batch-size', type=int, default=100, help="Messages per pooled connection")
+        parser.add_argument('--handshake-delay', type=float, default=0.05,
+                            help="Seconds the fake server waits on EHLO, standing in for a TLS handshake")
+        parser.add_argument('--port', type=int, default=8025)
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError("aiosmtpd is required for this benchmark: pip install aiosmtpd")
+
+        handler = SlowHandshakeSink(options['handshake_delay'])
+        controller = Controller(handler, hostname='127.0.0.1', port=options['port'])
+        controller.start()
+
+        user = User(business_name='Benchmark Bistro', email='owner@example.com')
+        contacts = [
+            Contact(name=f"Customer {i}", phone='555-0100', email=f"customer{i}@example.com",
+                    review_url=f"https://bonrate.pro/review/{i}")
+            for i in range(options['count'])
+        ]
+
+        smtp_settings = dict(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=options['port'],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+        try:
+            with override_settings(**smtp_settings):
+                started = time.perf_counter()
+                for contact in contacts:
+                    build_review_email(contact, user).send()
+                per_message = time.perf_counter() - started
+
+                started = time.perf_counter()
+                batch_size = options['batch_size']
+                failed = 0
+                for start in range(0, len(contacts), batch_size):
+                    _, batch_failed = send_review_email_batch(contacts[start:start + batch_size], user)
+                    failed += len(batch_failed)
+                pooled = time.perf_counter() - started
+        finally:
+            controller.stop()
+
+        count = options['count']
+        self.stdout.write(f"Messages per path: {count} (server received {handler.received}, pooled failures {failed})")
+        self.stdout.write(f"Per-message connection: {per_message:.2f}s, {count / per_message:.1f} msg/s")
+        self.stdout.write(f"Pooled (batch {batch_size}):   {pooled:.2f}s, {count / pooled:.1f} msg/s")
+        self.stdout.write(f"Speedup: {per_message / pooled:.1f}x")
@@ -0,0 +1,99 @@
+import json
+import math
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from django.core.management.base import BaseCommand
+
+
+class SlowPlacesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        body = json.dumps({'status': 'OK', 'results': [], 'predictions': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = ("Flood a running server with place searches while probing a cheap endpoint, "
+            "to show whether slow Places calls starve other requests")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--search-path', default='/api/contacts/search-places/?query=loadtest-{n}',
+                            help="Place search URL; {n} is replaced so every request misses the cache")
+        parser.add_argument('--probe-path', default='/api/users/business-profile/',
+                            help="Endpoint whose latency is measured during the flood")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent place searches")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+        parser.add_argument('--fake-upstream-port', type=int, default=None,
+                            help="Start a slow fake Places API on this port; run the server with "
+                                 "GOOGLE_PLACES_BASE_URL=http://127.0.0.1:<port>")
+        parser.add_argument('--upstream-delay', type=float, default=1.0,
+                            help="Seconds the fake Places API takes per call")
+
+    def handle(self, *args, **options):
+        fake = None
+        if options['fake_upstream_port']:
+            fake = ThreadingHTTPServer(('127.0.0.1', options['fake_upstream_port']), SlowPlacesHandler)
+            fake.delay = options['upstream_delay']
+            threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+        base_url = options['base_url'].rstrip('/')
+        deadline = time.monotonic() + options['duration']
+        search_latencies, probe_latencies = [], []
+        errors = {'search': 0, 'probe': 0}
+
+        def timed_get(url, timeout):
+            started = time.monotonic()
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+            return time.monotonic() - started
+
+        def search_loop():
+            while time.monotonic() < deadline:
+                url = base_url + options['search_path'].format(n=uuid.uuid4().hex[:8])
+                try:
+                    search_latencies.append(timed_get(url, 60))
+                except requests.RequestException:
+                    errors['search'] += 1
+
+        def probe_loop():
+            while time.monotonic() < deadline:
+                try:
+                    probe_latencies.append(timed_get(base_url + options['probe_path'], 60))
+                except requests.RequestException:
+                    errors['probe'] += 1
+                time.sleep(0.05)
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency'] + 1) as pool:
+                pool.submit(probe_loop)
+                for _ in range(options['concurrency']):
+                    pool.submit(search_loop)
+        finally:
+            if fake is not None:
+                fake.shutdown()
+
+        self.stdout.write(f"Place searches: {len(search_latencies)} ok, {errors['search']} failed, "
+                          f"{len(search_latencies) / options['duration']:.1f}/s")
+        self.stdout.write(f"Probe {options['probe_path']}: {len(probe_latencies)} ok, {errors['probe']} failed")
+        if probe_latencies:
+            probe_latencies.sort()
+            p95 = probe_latencies[max(0, math.ceil(len(probe_latencies) * 0.95) - 1)]
+            self.stdout.write(
+                f"Probe latency: p50 {statistics.median(probe_latencies) * 1000:.0f}ms, "
+                f"p95 {p95 * 1000:.0f}ms, max {probe_latencies[-1] * 1000:.0f}ms"
+            )
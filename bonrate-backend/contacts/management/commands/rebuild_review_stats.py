@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from contacts.models import User
+from contacts.review_stats import rebuild_review_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the review stats rollups from contacts, e.g. after writes that bypassed them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=None,
+                            help="Only rebuild this user id's stats")
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Accounts recounted per transaction")
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options['user'] is not None:
+            user_ids = user_ids.filter(pk=options['user'])
+
+        user_ids = list(user_ids)
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            rebuild_review_stats(user_ids[start:start + batch_size])
+            self.stdout.write(f"Rebuilt {min(start + batch_size, len(user_ids))} of {len(user_ids)} account(s)")
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from contacts.tracking import rollup_tracking_events
+
+
+class Command(BaseCommand):
+    help = "Fold recorded email opens and review link clicks into contact review statuses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Events applied per transaction")
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help="Seconds between rollups when running continuously")
+        parser.add_argument('--once', action='store_true',
+                            help="Apply pending events and exit instead of repeating")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            applied = rollup_tracking_events(batch_size=options['batch_size'])
+            if applied or options['once']:
+                self.stdout.write(f"Applied {applied} tracking event(s) in {time.monotonic() - started:.2f}s")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
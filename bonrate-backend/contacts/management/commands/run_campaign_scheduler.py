@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from contacts.campaigns import run_due_steps
+
+
+class Command(BaseCommand):
+    help = "Send due campaign steps in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=10.0,
+                            help="Seconds to sleep when no steps are due")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Due steps claimed per batch")
+        parser.add_argument('--once', action='store_true',
+                            help="Process everything due now and exit instead of polling forever")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Campaign scheduler started")
+        while True:
+            stats = run_due_steps(batch_size=options['batch_size'])
+            if stats is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(
+                f"Batch done: {stats['sent']} sent, {stats['failed']} failed, "
+                f"{stats['stopped']} stopped, {stats['deferred']} deferred"
+            )
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from contacts.email_queue import claim_next_job, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued bulk review email jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Contacts sent per progress update")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue and exit instead of polling forever")
+        parser.add_argument('--requeue-stale', action='store_true',
+                            help="Requeue jobs whose worker's lease has expired before starting")
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            count = requeue_stale_jobs()
+            self.stdout.write(f"Requeued {count} stale job(s)")
+
+        self.stdout.write("Email worker started")
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Processing job {job.id} ({job.total_count} contacts)")
+            job_status = run_job(job, chunk_size=options['chunk_size'])
+            if job_status == 'queued':
+                self.stdout.write(f"Job {job.id} deferred by the send rate limit")
+            elif job_status == 'lost':
+                self.stdout.write(f"Job {job.id} taken over by another worker after its lease expired")
+            else:
+                self.stdout.write(f"Job {job.id} {job_status}")
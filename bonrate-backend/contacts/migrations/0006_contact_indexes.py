@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0005_emailjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="contact_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                fields=["user", "review_status", "-created_at"],
+                name="contact_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                fields=["business_place_id"], name="contact_place_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:54
+
+import secrets
+import string
+
+from django.conf import settings
+from django.db import migrations, models
+
+ALPHABET = string.digits + string.ascii_letters
+
+
+def assign_short_codes(apps, schema_editor):
+    """Give existing contacts a short code and point review_url at it"""
+    Contact = apps.get_model("contacts", "Contact")
+    contacts = list(
+        Contact.objects.filter(short_code__isnull=True).only("id", "review_url")
+    )
+    for contact in contacts:
+        contact.short_code = "".join(secrets.choice(ALPHABET) for _ in range(8))
+        # The old /review/<uuid> links never resolved, so they can be replaced
+        if not contact.review_url or "/review/" in contact.review_url:
+            contact.review_url = (
+                f"{settings.REVIEW_LINK_BASE_URL}/r/{contact.short_code}"
+            )
+    Contact.objects.bulk_update(contacts, ["short_code", "review_url"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0006_contact_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="click_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="last_clicked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="short_code",
+            field=models.CharField(
+                blank=True, editable=False, max_length=16, null=True, unique=True
+            ),
+        ),
+        migrations.RunPython(assign_short_codes, migrations.RunPython.noop),
+    ]
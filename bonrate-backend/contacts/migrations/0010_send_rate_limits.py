@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0009_campaigns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=200, primary_key=True, serialize=False),
+                ),
+                ("tokens", models.FloatField()),
+                ("refilled_at", models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="emailjob",
+            name="run_after",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
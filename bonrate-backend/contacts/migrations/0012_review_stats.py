@@ -0,0 +1,122 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_review_stats(apps, schema_editor):
+    """Seed the rollups from existing contacts.
+
+    Status counts are exact. Past sends, opens and completions were never
+    dated, so only ``added`` is filled in for earlier days.
+    """
+    Contact = apps.get_model("contacts", "Contact")
+    ReviewStatusCount = apps.get_model("contacts", "ReviewStatusCount")
+    DailyReviewStats = apps.get_model("contacts", "DailyReviewStats")
+    ReviewStatusCount.objects.bulk_create(
+        [
+            ReviewStatusCount(
+                user_id=row["user_id"],
+                review_status=row["review_status"],
+                count=row["count"],
+            )
+            for row in Contact.objects.values("user_id", "review_status")
+            .annotate(count=Count("id"))
+            .order_by()
+        ],
+        batch_size=500,
+    )
+    DailyReviewStats.objects.bulk_create(
+        [
+            DailyReviewStats(user_id=row["user_id"], day=row["day"], added=row["added"])
+            for row in Contact.objects.annotate(day=TruncDate("created_at"))
+            .values("user_id", "day")
+            .annotate(added=Count("id"))
+            .order_by()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0011_email_templates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyReviewStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("added", models.PositiveIntegerField(default=0)),
+                ("sent", models.PositiveIntegerField(default=0)),
+                ("opened", models.PositiveIntegerField(default=0)),
+                ("completed", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_review_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["day"],
+                "unique_together": {("user", "day")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ReviewStatusCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "review_status",
+                    models.CharField(
+                        choices=[
+                            ("not_sent", "Not Sent"),
+                            ("sent", "Sent"),
+                            ("pending", "Pending"),
+                            ("completed", "Completed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_status_counts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "review_status")},
+            },
+        ),
+        migrations.RunPython(backfill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+def pause_inactive_campaign_enrollments(apps, schema_editor):
+    """Move enrollments of campaigns that are not active out of the due index"""
+    CampaignEnrollment = apps.get_model("contacts", "CampaignEnrollment")
+    CampaignEnrollment.objects.filter(status="active").exclude(
+        campaign__status="active"
+    ).update(status="paused")
+
+
+def resume_paused_enrollments(apps, schema_editor):
+    CampaignEnrollment = apps.get_model("contacts", "CampaignEnrollment")
+    CampaignEnrollment.objects.filter(status="paused").update(status="active")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0012_review_stats"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="campaignenrollment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("active", "Active"),
+                    ("paused", "Paused"),
+                    ("completed", "Completed"),
+                    ("stopped", "Stopped"),
+                    ("failed", "Failed"),
+                ],
+                default="active",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(
+            pause_inactive_campaign_enrollments, resume_paused_enrollments
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0013_campaign_enrollment_paused"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailjob",
+            name="claimed_by",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="emailjob",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+def mark_applied_events(apps, schema_editor):
+    """Flag the events the id cursor has already applied"""
+    TrackingEvent = apps.get_model("contacts", "TrackingEvent")
+    TrackingRollupCursor = apps.get_model("contacts", "TrackingRollupCursor")
+    cursor = TrackingRollupCursor.objects.filter(name="review_status").first()
+    if cursor is not None:
+        TrackingEvent.objects.filter(id__lte=cursor.last_event_id).update(rolled_up=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0014_emailjob_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trackingevent",
+            name="rolled_up",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_applied_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="trackingevent",
+            index=models.Index(
+                condition=models.Q(("rolled_up", False)),
+                fields=["id"],
+                name="trackingevent_pending_idx",
+            ),
+        ),
+    ]
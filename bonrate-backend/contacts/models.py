@@ -1,9 +1,66 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from datetime import timedelta
+import secrets
+import string
 import uuid
 
 User = get_user_model()
 
+REVIEW_LINK_FIELDS = ['short_code', 'review_url', 'google_review_url']
+
+SHORT_CODE_ALPHABET = string.digits + string.ascii_letters
+SHORT_CODE_LENGTH = 8
+
+def generate_short_code():
+    """Random base62 code; 62**8 values keep collisions negligible"""
+    return ''.join(secrets.choice(SHORT_CODE_ALPHABET) for _ in range(SHORT_CODE_LENGTH))
+
+class ContactQuerySet(models.QuerySet):
+    def backfill_review_links(self, batch_size=500, force=False, progress=None):
+        """Generate review links for every contact in the queryset.
+
+        Rows are read in primary key order with only the columns the links
+        depend on and written back with ``bulk_update``, ``batch_size`` at a
+        time, so no per-row ``save()`` runs. ``force`` rebuilds links that
+        are already set, e.g. after a business place_id change.
+        ``progress(scanned, updated)`` is called after every batch.
+        Returns ``(scanned, updated)``.
+        """
+        queryset = self.order_by('pk').only('id', 'business_place_id', *REVIEW_LINK_FIELDS)
+        if not force:
+            queryset = queryset.filter(
+                models.Q(short_code__isnull=True) | models.Q(review_url__isnull=True) | models.Q(review_url='')
+                | (models.Q(google_review_url__isnull=True) | models.Q(google_review_url=''))
+                & ~models.Q(business_place_id__isnull=True) & ~models.Q(business_place_id='')
+            )
+        
+        scanned = updated = 0
+        last_pk = None
+        while True:
+            # Keyset paging keeps each batch query cheap however far in we are
+            batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+            
+            changed = []
+            for contact in batch:
+                before = [getattr(contact, field) for field in REVIEW_LINK_FIELDS]
+                contact.populate_review_urls(force=force)
+                if [getattr(contact, field) for field in REVIEW_LINK_FIELDS] != before:
+                    changed.append(contact)
+            if changed:
+                self.model.objects.bulk_update(changed, REVIEW_LINK_FIELDS, batch_size=batch_size)
+            
+            scanned += len(batch)
+            updated += len(changed)
+            last_pk = batch[-1].pk
+            if progress:
+                progress(scanned, updated)
+        return scanned, updated
+
 class Contact(models.Model):
     REVIEW_STATUS_CHOICES = [
         ('not_sent', 'Not Sent'),
@@ -23,23 +80,281 @@ class Contact(models.Model):
     google_review_url = models.URLField(blank=True, null=True)
     review_url = models.URLField(blank=True, null=True)
     review_status = models.CharField(max_length=20, choices=REVIEW_STATUS_CHOICES, default='not_sent')
+    # Public code in review_url; resolved by the /r/<code> redirect
+    short_code = models.CharField(max_length=16, unique=True, blank=True, null=True, editable=False)
+    # Maintained by the tracking rollup from TrackingEvent rows
+    open_count = models.PositiveIntegerField(default=0)
+    last_opened_at = models.DateTimeField(blank=True, null=True)
+    click_count = models.PositiveIntegerField(default=0)
+    last_clicked_at = models.DateTimeField(blank=True, null=True)
     last_contact = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ContactQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'email']
+        indexes = [
+            # Contact list pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=['user', '-created_at', '-id'], name='contact_user_created_idx'),
+            # Status filters and per-status counts, still ordered for paging
+            models.Index(fields=['user', 'review_status', '-created_at'], name='contact_user_status_idx'),
+            models.Index(fields=['business_place_id'], name='contact_place_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.email}"
     
-    def save(self, *args, **kwargs):
-        if not self.review_url:
-            self.review_url = f"https://bonrate.pro/review/{self.id}"
+    def populate_review_urls(self, force=False):
+        """Fill in review links; bulk_create skips save(), so callers use this directly.
+        
+        With ``force`` both links are rebuilt from the current short code and
+        place_id. An existing short code is never replaced, since it has
+        already gone out in emails.
+        """
+        if not self.short_code:
+            self.short_code = generate_short_code()
+        
+        if force or not self.review_url:
+            self.review_url = f"{settings.REVIEW_LINK_BASE_URL}/r/{self.short_code}"
         
         # Generate Google review URL if business_place_id exists
-        if self.business_place_id and not self.google_review_url:
+        if self.business_place_id and (force or not self.google_review_url):
             self.google_review_url = f"https://search.google.com/local/writereview?placeid={self.business_place_id}"
-        
-        super().save(*args, **kwargs)
\ No newline at end of file
+        elif force and not self.business_place_id:
+            self.google_review_url = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the review stats receivers tell what a later save changed
+        instance._stored_review_status = instance.__dict__.get('review_status')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        self.populate_review_urls()
+        super().save(*args, **kwargs)
+
+class EmailTemplate(models.Model):
+    """Per-account review email subject and body with {variable} placeholders"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_templates')
+    name = models.CharField(max_length=200)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    is_default = models.BooleanField(default=False)
+    # Bumped on every subject/body change; compiled templates are cached by (id, version)
+    version = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(is_default=True), name='emailtemplate_one_default_per_user'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            stored = EmailTemplate.objects.filter(pk=self.pk).values('subject', 'body').first()
+            if stored is not None and stored != {'subject': self.subject, 'body': self.body}:
+                # New version, so every worker recompiles instead of using its cached copy
+                self.version += 1
+        super().save(*args, **kwargs)
+
+class EmailJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_jobs')
+    contact_ids = models.JSONField(default=list)
+    template = models.ForeignKey(EmailTemplate, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_count = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Set when the send rate limit deferred the job; not claimed before then
+    run_after = models.DateTimeField(blank=True, null=True)
+    # Worker running the job; it renews the lease as it records progress
+    claimed_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='emailjob_status_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"EmailJob {self.id} ({self.status})"
+
+class RateLimitBucket(models.Model):
+    """Shared token bucket state for the database rate limit backend"""
+    key = models.CharField(max_length=200, primary_key=True)
+    tokens = models.FloatField()
+    # Unix time of the last refill
+    refilled_at = models.FloatField()
+    
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.1f}"
+
+class TrackingEvent(models.Model):
+    """Append-only log of review email opens and review link clicks"""
+    EVENT_TYPE_CHOICES = [
+        ('open', 'Open'),
+        ('click', 'Click'),
+    ]
+    
+    # No FK constraint: events are buffered and may land after the contact
+    # is deleted, and an insert-only log should not slow contact deletes
+    contact = models.ForeignKey(
+        Contact, on_delete=models.DO_NOTHING, db_constraint=False, related_name='tracking_events'
+    )
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES)
+    occurred_at = models.DateTimeField()
+    # Set in the transaction that folds the event into its contact. Ids can
+    # commit out of order, so "after the last id applied" would miss some
+    rolled_up = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(rolled_up=False), name='trackingevent_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.contact_id} at {self.occurred_at}"
+
+class TrackingRollupCursor(models.Model):
+    """Locked by a running rollup; ``last_event_id`` is the highest event id it has applied"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_event_id}"
+
+class Campaign(models.Model):
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('active', 'Active'),
+        ('paused', 'Paused'),
+        ('archived', 'Archived'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaigns')
+    name = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+class CampaignStep(models.Model):
+    """One email in a drip sequence, sent ``delay`` after the previous step"""
+    CONDITION_CHOICES = [
+        ('always', 'Always'),
+        ('not_completed', 'Only if the review is not completed'),
+    ]
+    
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='steps')
+    position = models.PositiveSmallIntegerField()
+    delay = models.DurationField(default=timedelta(0))
+    condition = models.CharField(max_length=20, choices=CONDITION_CHOICES, default='not_completed')
+    template = models.ForeignKey(EmailTemplate, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    
+    class Meta:
+        ordering = ['campaign', 'position']
+        unique_together = ['campaign', 'position']
+    
+    def __str__(self):
+        return f"{self.campaign.name} step {self.position}"
+
+class CampaignEnrollment(models.Model):
+    """A contact's progress through a campaign.
+    
+    ``next_step`` is the index into the campaign's ordered steps and
+    ``next_run_at`` is when it is due; the scheduler only ever reads rows
+    through the partial index on active ``next_run_at``. Enrollments are
+    paused while their campaign is not active, which keeps them out of it.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('paused', 'Paused'),
+        ('completed', 'Completed'),
+        ('stopped', 'Stopped'),
+        ('failed', 'Failed'),
+    ]
+    
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='enrollments')
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name='campaign_enrollments')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    next_step = models.PositiveSmallIntegerField(default=0)
+    next_run_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Set while a scheduler worker holds the row
+    claim_token = models.UUIDField(blank=True, null=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['campaign', 'contact']
+        indexes = [
+            # Due steps: WHERE status = 'active' AND next_run_at <= now ORDER BY next_run_at
+            models.Index(fields=['next_run_at'], name='enrollment_due_idx', condition=models.Q(status='active')),
+            models.Index(fields=['claim_token'], name='enrollment_claim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.contact_id} in {self.campaign_id} ({self.status})"
+
+class ReviewStatusCount(models.Model):
+    """Contacts per review status for one account, kept current as statuses change"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_status_counts')
+    review_status = models.CharField(max_length=20, choices=Contact.REVIEW_STATUS_CHOICES)
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'review_status']
+    
+    def __str__(self):
+        return f"{self.user_id} {self.review_status}: {self.count}"
+
+class DailyReviewStats(models.Model):
+    """Per-account daily counts of contacts added and review status transitions"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_review_stats')
+    day = models.DateField()
+    added = models.PositiveIntegerField(default=0)
+    # Contacts moved to sent, to pending by a tracked open or click, and to completed that day
+    sent = models.PositiveIntegerField(default=0)
+    opened = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['day']
+        # Date range reads for the stats endpoint: WHERE user_id = ? AND day >= ?
+        unique_together = ['user', 'day']
+    
+    def __str__(self):
+        return f"{self.user_id} {self.day}"
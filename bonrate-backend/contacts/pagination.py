@@ -0,0 +1,88 @@
+import base64
+import binascii
+import uuid
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """Cursor pagination over ``(created_at, id)``, newest first.
+
+    Each page is a range scan that starts right after the last row of the
+    previous page, so fetching page N costs the same as fetching page 1
+    regardless of how many contacts the account has.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-created_at', '-id')
+
+    def __init__(self):
+        self.page_size = settings.CONTACTS_PAGE_SIZE
+        self.max_page_size = settings.CONTACTS_MAX_PAGE_SIZE
+
+    def encode_cursor(self, created_at, pk):
+        raw = f"{created_at.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, pk = base64.urlsafe_b64decode(padded).decode().split('|', 1)
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            created_at = None
+        if created_at is None:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return created_at, pk
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request):
+        """Return the rows of the requested page and remember the next cursor.
+
+        ``queryset`` may be a values() queryset that includes ``created_at`` and ``id``.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(*self.row_key(rows[-1])) if self.has_next else None
+        return rows
+
+    def row_key(self, row):
+        # Rows are model instances or values() dicts
+        if isinstance(row, dict):
+            return row['created_at'], row['id']
+        return row.created_at, row.id
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from .autocomplete import SingleFlight
+from .http_client import get_google_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+_evict_lock = threading.Lock()
+# Cache size as of this process's last scan plus what it has written since.
+# Other workers' writes are picked up by the periodic rescan.
+_size_lock = threading.Lock()
+_cache_bytes = None
+_scanned_at = 0.0
+
+# Concurrent misses for one photo share a single upstream fetch
+photo_fetches = SingleFlight()
+
+class PhotoNotFound(Exception):
+    pass
+
+def _cache_root():
+    return Path(settings.PLACE_PHOTO_CACHE_DIR)
+
+def _ref_path(photo_reference, width):
+    key = hashlib.sha256(f"{photo_reference}:{width}".encode()).hexdigest()
+    return _cache_root() / 'refs' / key[:2] / key
+
+def _blob_path(digest):
+    return _cache_root() / 'blobs' / digest[:2] / digest
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def make_thumbnail(content, width):
+    """Shrink an image to ``width`` and re-encode it as JPEG.
+
+    Google already scales to ``maxwidth``; re-encoding strips metadata and
+    caps quality. Without Pillow the upstream bytes are kept as they are.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return content, None
+
+    try:
+        image = Image.open(io.BytesIO(content))
+        image.thumbnail((width, width * 4))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=settings.PLACE_PHOTO_JPEG_QUALITY, optimize=True)
+        return output.getvalue(), 'image/jpeg'
+    except Exception:
+        logger.warning("Could not resize place photo; caching it unchanged", exc_info=True)
+        return content, None
+
+def get_photo(photo_reference, width):
+    """Return ``(path, digest, content_type)`` for a place photo thumbnail.
+
+    Thumbnails are stored once under the SHA-256 of their bytes; a small
+    ref file maps ``(photo_reference, width)`` to that digest so repeat
+    requests never reach Google. Concurrent misses for the same photo
+    wait for one fetch.
+    """
+    ref_path = _ref_path(photo_reference, width)
+    try:
+        digest, content_type = ref_path.read_text().split(' ', 1)
+        blob_path = _blob_path(digest)
+        # Bump mtime so eviction treats this photo as recently used
+        os.utime(blob_path)
+        return blob_path, digest, content_type
+    except (FileNotFoundError, ValueError):
+        pass
+
+    result, _ = photo_fetches.do((photo_reference, width), lambda: _fetch_photo(photo_reference, width, ref_path))
+    return result
+
+def _fetch_photo(photo_reference, width, ref_path):
+    params = {
+        'photoreference': photo_reference,
+        'maxwidth': width,
+        'key': settings.GOOGLE_PLACES_API_KEY,
+    }
+    content, content_type = get_google_client().get_bytes('photo', params)
+    if not content_type.startswith('image/'):
+        raise PhotoNotFound(photo_reference)
+
+    content, thumbnail_type = make_thumbnail(content, width)
+    content_type = thumbnail_type or content_type
+    digest = hashlib.sha256(content).hexdigest()
+    blob_path = _blob_path(digest)
+    if not blob_path.exists():
+        _write_atomic(blob_path, content)
+        _photo_written(len(content))
+    _write_atomic(ref_path, f"{digest} {content_type}".encode())
+    return blob_path, digest, content_type
+
+def _photo_written(size):
+    """Count a new thumbnail; scan for eviction only once the cache may be full"""
+    global _cache_bytes
+    with _size_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += size
+        due = (
+            _cache_bytes is None
+            or _cache_bytes > settings.PLACE_PHOTO_CACHE_MAX_BYTES
+            or time.monotonic() - _scanned_at >= settings.PLACE_PHOTO_CACHE_SCAN_INTERVAL
+        )
+    if due:
+        evict_photos()
+
+def evict_photos(max_bytes=None):
+    """Delete least recently used thumbnails until the cache fits ``max_bytes``.
+
+    Scans the whole cache, so it runs only when the running size total
+    says the cache may be full, or after PLACE_PHOTO_CACHE_SCAN_INTERVAL.
+    """
+    global _cache_bytes, _scanned_at
+    max_bytes = max_bytes or settings.PLACE_PHOTO_CACHE_MAX_BYTES
+    blobs_root = _cache_root() / 'blobs'
+    if not _evict_lock.acquire(blocking=False):
+        return 0
+
+    try:
+        entries = []
+        total = 0
+        for path in blobs_root.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        if total > max_bytes:
+            removed, total = _evict_oldest(entries, total, max_bytes)
+        with _size_lock:
+            _cache_bytes, _scanned_at = total, time.monotonic()
+        return removed
+    finally:
+        _evict_lock.release()
+
+def _evict_oldest(entries, total, max_bytes):
+    """Delete the oldest of ``entries``; returns ``(removed, total)``"""
+    # Trim to 90% so every new photo does not trigger another scan
+    target = max_bytes * 0.9
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    # Ref files that now point at a missing blob are refetched on next use
+    return removed, total
@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+STATS_KEYS = (
+    'hits', 'negative_hits', 'stale_hits', 'misses', 'refreshes', 'upstream_errors',
+    'autocomplete_upstream_calls', 'autocomplete_exact_hits', 'autocomplete_prefix_hits',
+    'autocomplete_coalesced', 'completed_searches',
+)
+
+def get_places_cache():
+    return caches[settings.GOOGLE_PLACES_CACHE_ALIAS]
+
+def normalize_search(query, location=None):
+    """Collapse case and whitespace so retyped searches share a cache entry"""
+    query = ' '.join((query or '').lower().split())
+    location = ' '.join((location or '').lower().split())
+    return query, location
+
+def make_cache_key(kind, *parts):
+    digest = hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+    return f"places:{kind}:{digest}"
+
+def record_stat(stat):
+    """Increment one of the STATS_KEYS counters"""
+    cache = get_places_cache()
+    key = f"places:stats:{stat}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); the count restarts
+        cache.set(key, 1, timeout=None)
+
+def search_cache_key(kind, query, location=None):
+    return make_cache_key(kind, *normalize_search(query, location))
+
+def get_cached_search(key):
+    """Return cached results for ``key``, or None on a miss"""
+    entry = get_places_cache().get(key)
+    if entry is None:
+        record_stat('misses')
+        return None
+    record_stat('negative_hits' if entry['status'] == 'ZERO_RESULTS' else 'hits')
+    return entry['results']
+
+def store_search(key, status, results):
+    """Cache a fetched search according to its Places API status"""
+    cache = get_places_cache()
+    if status == 'OK':
+        cache.set(key, {'status': status, 'results': results}, settings.GOOGLE_PLACES_CACHE_TTL)
+    elif status == 'ZERO_RESULTS':
+        cache.set(key, {'status': status, 'results': []}, settings.GOOGLE_PLACES_NEGATIVE_CACHE_TTL)
+    else:
+        record_stat('upstream_errors')
+
+def cached_search(kind, query, location, fetch):
+    """Return cached results for a normalized ``(query, location)``, fetching on a miss.
+
+    ``fetch`` is called with no arguments and returns ``(status, results)``
+    using the Places API status string. OK responses are cached for
+    GOOGLE_PLACES_CACHE_TTL seconds and ZERO_RESULTS for the shorter
+    GOOGLE_PLACES_NEGATIVE_CACHE_TTL; anything else is an upstream error
+    and is not cached.
+    """
+    key = search_cache_key(kind, query, location)
+    results = get_cached_search(key)
+    if results is None:
+        status, results = fetch()
+        store_search(key, status, results)
+    return results
+
+def get_cached_record(key, fresh_ttl, refresh):
+    """Return ``(found, record)`` for ``key``.
+
+    When the entry is past ``fresh_ttl`` it is still returned, and the
+    first caller to notice runs ``refresh`` in a background thread.
+    """
+    cache = get_places_cache()
+    entry = cache.get(key)
+    if entry is None:
+        record_stat('misses')
+        return False, None
+
+    if entry['record'] is None:
+        record_stat('negative_hits')
+    elif time.time() - entry['fetched_at'] < fresh_ttl:
+        record_stat('hits')
+    else:
+        record_stat('stale_hits')
+        # Only one request per key kicks off the refresh
+        if cache.add(f"{key}:refreshing", 1, timeout=60):
+            threading.Thread(target=refresh, daemon=True).start()
+    return True, entry['record']
+
+def store_record(key, status, record, fresh_ttl, stale_ttl, negative_ttl):
+    """Cache a fetched record and return it, or None if it was not found"""
+    cache = get_places_cache()
+    if status == 'OK':
+        cache.set(key, {'record': record, 'fetched_at': time.time()}, fresh_ttl + stale_ttl)
+        return record
+    if status in ('NOT_FOUND', 'ZERO_RESULTS'):
+        cache.set(key, {'record': None, 'fetched_at': time.time()}, negative_ttl)
+    else:
+        record_stat('upstream_errors')
+    return None
+
+def refresh_record(key, fetch, fresh_ttl, stale_ttl):
+    """Refetch a stale record in the background, keeping the stale copy on failure"""
+    record_stat('refreshes')
+    try:
+        status, record = fetch()
+        if status == 'OK':
+            get_places_cache().set(key, {'record': record, 'fetched_at': time.time()}, fresh_ttl + stale_ttl)
+        else:
+            # Keep serving the stale copy until it expires on its own
+            record_stat('upstream_errors')
+    except Exception:
+        logger.exception("Background refresh failed for %s", key)
+    finally:
+        get_places_cache().delete(f"{key}:refreshing")
+
+def cached_record(kind, record_id, fetch, fresh_ttl, stale_ttl, negative_ttl):
+    """Return a cached record, serving stale copies while a refresh runs.
+
+    ``fetch`` returns ``(status, record)``. For ``fresh_ttl`` seconds after a
+    fetch the cached record is returned as is. For a further ``stale_ttl``
+    seconds it is still returned immediately, but the first request to see
+    it stale starts a background refetch. NOT_FOUND/ZERO_RESULTS are cached
+    as ``None`` for ``negative_ttl``; other errors are not cached.
+    """
+    key = make_cache_key(kind, record_id)
+    found, record = get_cached_record(key, fresh_ttl, lambda: refresh_record(key, fetch, fresh_ttl, stale_ttl))
+    if found:
+        return record
+    status, record = fetch()
+    return store_record(key, status, record, fresh_ttl, stale_ttl, negative_ttl)
+
+def get_cache_stats():
+    cache = get_places_cache()
+    values = cache.get_many([f"places:stats:{stat}" for stat in STATS_KEYS])
+    return {stat: values.get(f"places:stats:{stat}", 0) for stat in STATS_KEYS}
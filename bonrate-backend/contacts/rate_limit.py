@@ -0,0 +1,125 @@
+import math
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from .models import RateLimitBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ``rate`` is tokens added per second; a full bucket allows a burst of ``capacity``
+Bucket = namedtuple('Bucket', ['key', 'capacity', 'rate'])
+
+class RateLimitUnavailable(Exception):
+    """The shared rate limit state could not be locked"""
+
+def take_tokens(buckets, states, count, now):
+    """Refill ``states`` and take up to ``count`` tokens from every bucket at once.
+
+    ``states`` maps bucket key to ``(tokens, refilled_at)``; missing keys
+    start full. Returns ``(granted, retry_after, new_states)`` where
+    ``retry_after`` is the seconds until the next token would be available
+    in every bucket, or 0 when the whole request was granted.
+    """
+    levels = {}
+    for bucket in buckets:
+        tokens, refilled_at = states.get(bucket.key) or (bucket.capacity, now)
+        levels[bucket.key] = min(bucket.capacity, tokens + max(0.0, now - refilled_at) * bucket.rate)
+
+    granted = max(0, min(count, *(math.floor(level) for level in levels.values())))
+    retry_after = 0.0
+    new_states = {}
+    for bucket in buckets:
+        level = levels[bucket.key] - granted
+        new_states[bucket.key] = (level, now)
+        if granted < count and level < 1:
+            retry_after = max(retry_after, (1 - level) / bucket.rate)
+    return granted, retry_after, new_states
+
+class DatabaseBucketStore:
+    """Bucket state in RateLimitBucket rows, locked for the update"""
+
+    def acquire(self, buckets, count, now):
+        keys = sorted(bucket.key for bucket in buckets)
+        with transaction.atomic():
+            RateLimitBucket.objects.bulk_create(
+                [RateLimitBucket(key=bucket.key, tokens=bucket.capacity, refilled_at=now) for bucket in buckets],
+                ignore_conflicts=True,
+            )
+            # Rows are locked in key order so concurrent callers cannot deadlock
+            rows = {row.key: row for row in RateLimitBucket.objects.select_for_update().filter(key__in=keys).order_by('key')}
+            states = {key: (row.tokens, row.refilled_at) for key, row in rows.items()}
+            granted, retry_after, new_states = take_tokens(buckets, states, count, now)
+            for key, (tokens, refilled_at) in new_states.items():
+                rows[key].tokens = tokens
+                rows[key].refilled_at = refilled_at
+            RateLimitBucket.objects.bulk_update(rows.values(), ['tokens', 'refilled_at'])
+        return granted, retry_after
+
+class CacheBucketStore:
+    """Bucket state in a Django cache, serialized by short-lived add() locks"""
+
+    lock_timeout = 5
+    lock_wait = 2.0
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def acquire(self, buckets, count, now):
+        cache = caches[self.alias]
+        keys = sorted(bucket.key for bucket in buckets)
+        locks = []
+        try:
+            for key in keys:
+                lock_key = f"ratelimit:lock:{key}"
+                deadline = time.monotonic() + self.lock_wait
+                while not cache.add(lock_key, 1, timeout=self.lock_timeout):
+                    if time.monotonic() >= deadline:
+                        raise RateLimitUnavailable(f"Timed out locking {key}")
+                    time.sleep(0.01)
+                locks.append(lock_key)
+
+            stored = cache.get_many([f"ratelimit:{key}" for key in keys])
+            states = {key: stored.get(f"ratelimit:{key}") for key in keys}
+            granted, retry_after, new_states = take_tokens(buckets, states, count, now)
+            # Idle buckets refill completely, so they can expire after a full refill
+            cache.set_many(
+                {f"ratelimit:{bucket.key}": new_states[bucket.key] for bucket in buckets},
+                timeout=max(math.ceil(bucket.capacity / bucket.rate) for bucket in buckets),
+            )
+            return granted, retry_after
+        finally:
+            cache.delete_many(locks)
+
+def get_bucket_store():
+    if settings.EMAIL_RATE_LIMIT_BACKEND == 'cache':
+        return CacheBucketStore(settings.EMAIL_RATE_LIMIT_CACHE_ALIAS)
+    return DatabaseBucketStore()
+
+def send_buckets(user):
+    """Buckets one review email draws from: the sender's account and the SMTP provider"""
+    account = f"email:account:{user.pk}"
+    provider = f"email:provider:{settings.EMAIL_HOST}"
+    return [
+        Bucket(f"{account}:minute", settings.EMAIL_ACCOUNT_RATE_PER_MINUTE, settings.EMAIL_ACCOUNT_RATE_PER_MINUTE / 60),
+        Bucket(f"{account}:day", settings.EMAIL_ACCOUNT_RATE_PER_DAY, settings.EMAIL_ACCOUNT_RATE_PER_DAY / 86400),
+        Bucket(f"{provider}:minute", settings.EMAIL_PROVIDER_RATE_PER_MINUTE, settings.EMAIL_PROVIDER_RATE_PER_MINUTE / 60),
+        Bucket(f"{provider}:day", settings.EMAIL_PROVIDER_RATE_PER_DAY, settings.EMAIL_PROVIDER_RATE_PER_DAY / 86400),
+    ]
+
+def acquire_send_tokens(user, count):
+    """Reserve up to ``count`` review email sends for ``user``.
+
+    Returns ``(granted, retry_after)``: send ``granted`` messages now and
+    defer the rest by ``retry_after`` seconds. Nothing is ever refused
+    outright, so callers reschedule rather than fail.
+    """
+    if not settings.EMAIL_RATE_LIMIT_ENABLED or count <= 0:
+        return count, 0.0
+    try:
+        return get_bucket_store().acquire(send_buckets(user), count, time.time())
+    except RateLimitUnavailable:
+        logger.warning("Send rate limit state busy; deferring %d email(s)", count)
+        return 0, 1.0
@@ -0,0 +1,39 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional; plain JSONRenderer is used without it
+    orjson = None
+
+# UTF-8 encodings of U+2028 and U+2029
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    For strings, integers and the types DRF's encoder handles (datetimes,
+    lazy strings, Decimals go through it) the output is the same compact JSON,
+    with U+2028 and U+2029 escaped as DRF does. orjson writes NaN and
+    Infinity as null where strict DRF raises, and spells float exponents
+    differently, so use it for data without floats. Indented or ASCII-only
+    output still uses the json module.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(
+            data,
+            default=self.encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Line and paragraph separators are valid JSON but break JavaScript parsers
+        if LINE_SEPARATOR in content or PARAGRAPH_SEPARATOR in content:
+            content = content.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return content
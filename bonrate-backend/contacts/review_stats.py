@@ -0,0 +1,170 @@
+import hashlib
+import json
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Contact, DailyReviewStats, ReviewStatusCount
+
+# DailyReviewStats column counting moves into each status. Moves to pending
+# count as opens only when the tracking rollup made them, not manual edits
+DAILY_STATUS_FIELDS = {'sent': 'sent', 'completed': 'completed'}
+DAILY_FIELDS = ('added', 'sent', 'opened', 'completed')
+
+def _increment(model, lookup, deltas):
+    """Add ``deltas`` to the row matching ``lookup``, creating it if needed.
+
+    Rows are only created for increases: a decrease with no row to apply
+    to comes from an account being deleted along with its rollups.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates) or min(deltas.values()) < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created concurrently by another writer
+        model.objects.filter(**lookup).update(**updates)
+
+def record_status_changes(changes, day=None, opened=False):
+    """Apply ``(user_id, old_status, new_status)`` moves to the rollups.
+
+    ``old_status`` is None for a new contact and ``new_status`` None for
+    a deleted one. ``opened`` marks moves to pending as tracked email
+    opens. Call inside the transaction that made the changes.
+    """
+    day = day or timezone.localdate()
+    status_deltas = Counter()
+    daily = defaultdict(Counter)
+    for user_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status is not None:
+            status_deltas[(user_id, old_status)] -= 1
+        if new_status is not None:
+            status_deltas[(user_id, new_status)] += 1
+        if old_status is None:
+            daily[user_id]['added'] += 1
+        elif new_status == 'pending' and opened:
+            daily[user_id]['opened'] += 1
+        elif new_status in DAILY_STATUS_FIELDS:
+            daily[user_id][DAILY_STATUS_FIELDS[new_status]] += 1
+
+    with transaction.atomic():
+        for (user_id, status), delta in sorted(status_deltas.items()):
+            if delta:
+                _increment(ReviewStatusCount, {'user_id': user_id, 'review_status': status}, {'count': delta})
+        for user_id, counts in sorted(daily.items()):
+            _increment(DailyReviewStats, {'user_id': user_id, 'day': day}, dict(counts))
+        # After commit, so a concurrent read cannot cache the old counts again
+        user_ids = {user_id for user_id, _ in status_deltas}
+        if user_ids:
+            transaction.on_commit(lambda: forget_contact_summaries(user_ids))
+
+@receiver(post_save, sender=Contact)
+def contact_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        record_status_changes([(instance.user_id, None, instance.review_status)])
+    elif update_fields is None or 'review_status' in update_fields:
+        old_status = getattr(instance, '_stored_review_status', None)
+        new_status = instance.__dict__.get('review_status')
+        if old_status is not None and new_status is not None:
+            record_status_changes([(instance.user_id, old_status, new_status)])
+    instance._stored_review_status = instance.__dict__.get('review_status')
+
+@receiver(post_delete, sender=Contact)
+def contact_deleted(sender, instance, **kwargs):
+    status = instance.__dict__.get('review_status')
+    if status is not None:
+        record_status_changes([(instance.user_id, status, None)])
+
+def rebuild_review_stats(user_ids):
+    """Recount the status rollup from the contacts of ``user_ids``.
+
+    Daily ``added`` counts are rebuilt from ``created_at``; the daily
+    status moves cannot be recovered, so they are left as they are.
+    """
+    with transaction.atomic():
+        ReviewStatusCount.objects.filter(user_id__in=user_ids).delete()
+        ReviewStatusCount.objects.bulk_create([
+            ReviewStatusCount(user_id=row['user_id'], review_status=row['review_status'], count=row['count'])
+            for row in Contact.objects.filter(user_id__in=user_ids)
+            .values('user_id', 'review_status').annotate(count=Count('id')).order_by()
+        ])
+        added = {
+            (row['user_id'], row['day']): row['added']
+            for row in Contact.objects.filter(user_id__in=user_ids)
+            .annotate(day=TruncDate('created_at')).values('user_id', 'day').annotate(added=Count('id')).order_by()
+        }
+        DailyReviewStats.objects.filter(user_id__in=user_ids).update(added=0)
+        DailyReviewStats.objects.bulk_create(
+            [DailyReviewStats(user_id=user_id, day=day) for user_id, day in added], ignore_conflicts=True
+        )
+        for (user_id, day), count in added.items():
+            DailyReviewStats.objects.filter(user_id=user_id, day=day).update(added=count)
+
+def contact_summary_cache_key(user_id):
+    return f"contact-summary:{user_id}"
+
+def forget_contact_summaries(user_ids):
+    cache.delete_many([contact_summary_cache_key(user_id) for user_id in user_ids])
+
+def contact_summary(user):
+    """Return ``(summary, etag)``: the account's contact count per review status.
+
+    Cached per account until a status change commits, so polls touch the
+    database only after something changed. The ETag is a hash of the counts.
+    """
+    key = contact_summary_cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    status_counts = {status: 0 for status, _ in Contact.REVIEW_STATUS_CHOICES}
+    status_counts.update(ReviewStatusCount.objects.filter(user=user).values_list('review_status', 'count'))
+    summary = {'total': sum(status_counts.values()), **status_counts}
+    digest = hashlib.sha1(json.dumps(summary, sort_keys=True).encode()).hexdigest()[:20]
+    cached = (summary, f'"{digest}"')
+    cache.set(key, cached, settings.CONTACT_SUMMARY_CACHE_TTL)
+    return cached
+
+def review_stats(user, days):
+    """Dashboard numbers for ``user`` over the last ``days`` days, read from the rollups only"""
+    summary, _ = contact_summary(user)
+    status_counts = {status: summary[status] for status, _ in Contact.REVIEW_STATUS_CHOICES}
+
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        row['day']: row
+        for row in DailyReviewStats.objects.filter(user=user, day__gte=start, day__lte=today).values('day', *DAILY_FIELDS)
+    }
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        daily.append({'date': day.isoformat(), **{field: row.get(field, 0) for field in DAILY_FIELDS}})
+    totals = {field: sum(entry[field] for entry in daily) for field in DAILY_FIELDS}
+
+    total_contacts = sum(status_counts.values())
+    requested = total_contacts - status_counts['not_sent']
+    return {
+        'total_contacts': total_contacts,
+        'status_counts': status_counts,
+        'completion_rate': _rate(status_counts['completed'], requested),
+        'days': days,
+        'totals': totals,
+        'open_rate': _rate(totals['opened'], totals['sent']),
+        'conversion_rate': _rate(totals['completed'], totals['sent']),
+        'daily': daily,
+    }
+
+def _rate(part, whole):
+    return round(100 * part / whole, 1) if whole else 0.0
@@ -1,5 +1,8 @@
-from rest_framework import serializers
-from .models import Contact
+from django.db import IntegrityError, transaction
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Campaign, CampaignStep, Contact, EmailJob, EmailTemplate
+from .email_templates import TemplateSyntaxError, compile_template
 
 class ContactSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,6 +10,50 @@ class ContactSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'phone', 'email', 'business_name', 'business_place_id', 'business_address', 'google_review_url', 'review_url', 'review_status', 'last_contact', 'created_at']
         read_only_fields = ['id', 'google_review_url', 'review_url', 'last_contact', 'created_at']
 
+def compile_representation(serializer_class):
+    """Precompile ``serializer_class`` for rows from ``values(*Meta.fields)``.
+    
+    Returns a function turning one row dict into the same data the
+    serializer would produce. Which fields need converting is worked out
+    once: text columns are passed through as they are, UUIDs become
+    strings and datetimes are formatted with the field's timezone looked up
+    in advance; anything else uses the field's own to_representation.
+    Only for serializers whose fields are all plain model columns.
+    """
+    converters = []
+    for name, field in serializer_class().fields.items():
+        if isinstance(field, (serializers.CharField, serializers.ChoiceField)):
+            continue
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            converters.append((name, str))
+        elif type(field) is serializers.DateTimeField and _iso_timezone(field) is not None:
+            converters.append((name, _iso_datetime(_iso_timezone(field))))
+        else:
+            converters.append((name, field.to_representation))
+    
+    def represent(row):
+        data = dict(row)
+        for name, convert in converters:
+            value = data[name]
+            if value is not None:
+                data[name] = convert(value)
+        return data
+    return represent
+
+def _iso_timezone(field):
+    """Timezone an ISO 8601 DateTimeField renders in, or None if it has another format"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return None
+    return getattr(field, 'timezone', None) or field.default_timezone()
+
+def _iso_datetime(tz):
+    """DateTimeField.to_representation for ISO 8601 output, with the timezone looked up once"""
+    def convert(value):
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
 class CreateContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contact
@@ -22,4 +69,78 @@ class CreateContactSerializer(serializers.ModelSerializer):
         
         if queryset.exists():
             raise serializers.ValidationError("A contact with this email already exists. Please use a different email or update the existing contact.")
-        return value
\ No newline at end of file
+        return value
+class EmailJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmailJob
+        fields = ['id', 'status', 'template', 'total_count', 'processed_count', 'success_count', 'failed_count', 'error', 'run_after', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+class ContactImportRowSerializer(serializers.ModelSerializer):
+    """Field-level validation for one import row; duplicate checks are done per chunk"""
+    class Meta:
+        model = Contact
+        fields = ['name', 'phone', 'email', 'business_name', 'business_place_id', 'business_address']
+
+class EmailTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmailTemplate
+        fields = ['id', 'name', 'subject', 'body', 'is_default', 'version', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'version', 'created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        subject = attrs.get('subject', getattr(self.instance, 'subject', ''))
+        body = attrs.get('body', getattr(self.instance, 'body', ''))
+        try:
+            compile_template(subject, body)
+        except TemplateSyntaxError as e:
+            raise serializers.ValidationError({'body': str(e)})
+        return attrs
+    
+    def save(self, **kwargs):
+        user = kwargs.get('user') or self.instance.user
+        try:
+            with transaction.atomic():
+                if self.validated_data.get('is_default'):
+                    # Only one default per account; the lock makes concurrent changes take turns
+                    list(EmailTemplate.objects.select_for_update().filter(user=user).values_list('pk', flat=True))
+                    EmailTemplate.objects.filter(user=user, is_default=True).exclude(pk=getattr(self.instance, 'pk', None)).update(is_default=False)
+                return super().save(**kwargs)
+        except IntegrityError:
+            # The account had no templates to lock and another default was created meanwhile
+            raise serializers.ValidationError({'is_default': "Another template was made the default at the same time."})
+    
+
+class CampaignStepSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CampaignStep
+        fields = ['position', 'delay', 'condition', 'template']
+    
+    def validate_template(self, value):
+        request = self.context.get('request')
+        if value is not None and request is not None and value.user_id != request.user.id:
+            raise serializers.ValidationError("Template not found.")
+        return value
+
+class CampaignSerializer(serializers.ModelSerializer):
+    steps = CampaignStepSerializer(many=True)
+    enrolled_count = serializers.IntegerField(read_only=True, default=0)
+    
+    class Meta:
+        model = Campaign
+        fields = ['id', 'name', 'status', 'steps', 'enrolled_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def validate_steps(self, value):
+        if not value:
+            raise serializers.ValidationError("A campaign needs at least one step.")
+        positions = [step['position'] for step in value]
+        if len(set(positions)) != len(positions):
+            raise serializers.ValidationError("Step positions must be unique.")
+        return value
+    
+    def create(self, validated_data):
+        steps = validated_data.pop('steps')
+        campaign = Campaign.objects.create(**validated_data)
+        CampaignStep.objects.bulk_create([CampaignStep(campaign=campaign, **step) for step in steps])
+        return campaign
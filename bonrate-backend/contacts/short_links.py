@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Contact
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cached in place of a target for codes that do not exist, so scans of
+# random codes do not reach the database
+MISSING = ''
+
+class LRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+def short_link_cache_key(code):
+    return f"shortlink:{code}"
+
+def fetch_short_link(code):
+    """Return ``(contact_id, target_url)`` from the database, or None.
+
+    ``target_url`` is empty when the contact has nowhere to send reviews.
+    """
+    row = Contact.objects.filter(short_code=code).values_list('id', 'google_review_url').first()
+    if row is None:
+        return None
+    contact_id, google_review_url = row
+    return str(contact_id), google_review_url or ''
+
+def resolve_short_code(code):
+    """Return ``(contact_id, target_url)`` for ``code``, or None if it does not resolve.
+
+    Checked in order: this worker's LRU, the shared default cache, then
+    the database. Misses are cached too, for the same TTLs.
+    """
+    link = local_links.get(code)
+    if link is None:
+        key = short_link_cache_key(code)
+        link = cache.get(key)
+        if link is None:
+            link = fetch_short_link(code) or MISSING
+            cache.set(key, link, settings.SHORT_LINK_CACHE_TTL)
+        local_links.set(code, link)
+    return link or None
+
+def forget_short_code(code):
+    local_links.delete(code)
+    cache.delete(short_link_cache_key(code))
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def invalidate_short_link(sender, instance, **kwargs):
+    """Drop the cached target when a contact's place_id changes or it is deleted.
+
+    Other workers' LRUs catch up within SHORT_LINK_LOCAL_CACHE_TTL.
+    """
+    if instance.short_code:
+        forget_short_code(instance.short_code)
+
+local_links = LRUCache(settings.SHORT_LINK_LOCAL_CACHE_ENTRIES, settings.SHORT_LINK_LOCAL_CACHE_TTL)
@@ -1,3 +1,770 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import fcntl
+import io
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.db.models import Count, Q
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from django.utils import timezone
+from bonratepro.middleware import RequestTimingMiddleware
+from .models import (
+    Campaign, CampaignEnrollment, CampaignStep, Contact, DailyReviewStats, EmailJob, EmailTemplate, ReviewStatusCount,
+    TrackingEvent,
+)
+from .email_service import send_bulk_review_emails, send_review_email
+from .email_queue import claim_next_job, enqueue_bulk_email_job, requeue_stale_jobs, run_job
+from .autocomplete import AsyncSingleFlight, PrefixCache
+from .campaigns import claim_due_enrollments, enroll_contacts, process_enrollments
+from .email_templates import TemplateSyntaxError, compile_template, render_review_emails
+from .exporters import iter_contacts_csv
+from .renderers import FastJSONRenderer
+from .serializers import ContactSerializer, compile_representation
+from .importers import import_contacts, iter_csv_rows
+from .short_links import fetch_short_link
+from . import photo_cache
+from .tracking import apply_events, rollup_tracking_events
+from .write_buffer import ContactWriteBuffer, _encode, apply_contact_writes, merge_change, read_journal
+from .http_client import (
+    CircuitOpenError, GoogleAPIError, get_async_google_client, get_circuit_breaker, get_google_client, reset_google_client,
+)
 
-# Create your tests here.
\ No newline at end of file
+
+@skipUnless(connection.vendor == 'sqlite', "Plan assertions are written against SQLite's EXPLAIN QUERY PLAN")
+class ContactQueryPlanTests(TestCase):
+    """Fail if the hot contact queries stop using an index and scan the table"""
+
+    user_id = 1
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if 'SCAN contacts_contact' in line]
+        self.assertFalse(scans, f"Full table scan on contacts_contact:\n{plan}")
+        self.assertIn('USING', plan, f"No index used:\n{plan}")
+
+    def test_contact_list_page(self):
+        queryset = Contact.objects.filter(user_id=self.user_id).order_by('-created_at', '-id')[:51]
+        self.assertUsesIndex(queryset)
+
+    def test_contact_list_next_page(self):
+        now = timezone.now()
+        queryset = (
+            Contact.objects.filter(user_id=self.user_id)
+            .filter(Q(created_at__lt=now) | Q(created_at=now, id__lt='ffffffff-ffff-ffff-ffff-ffffffffffff'))
+            .order_by('-created_at', '-id')[:51]
+        )
+        self.assertUsesIndex(queryset)
+
+    def test_filter_by_review_status(self):
+        queryset = Contact.objects.filter(user_id=self.user_id, review_status='sent').order_by('-created_at')[:51]
+        self.assertUsesIndex(queryset)
+
+    def test_count_by_review_status(self):
+        queryset = (
+            Contact.objects.filter(user_id=self.user_id)
+            .values('review_status')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        self.assertUsesIndex(queryset)
+
+    def test_lookup_by_business_place_id(self):
+        self.assertUsesIndex(Contact.objects.filter(business_place_id='ChIJ-place'))
+
+    def test_duplicate_email_check(self):
+        self.assertUsesIndex(Contact.objects.filter(user_id=self.user_id, email='a@example.com'))
+
+    def test_due_campaign_enrollments(self):
+        queryset = CampaignEnrollment.objects.filter(status='active', next_run_at__lte=timezone.now()).order_by('next_run_at')
+        self.assertUsesIndex(queryset[:100])
+
+    def test_pending_tracking_events(self):
+        plan = TrackingEvent.objects.filter(rolled_up=False).order_by('id')[:500].explain()
+        self.assertIn('trackingevent_pending_idx', plan)
+
+
+class FakePlacesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.client_ports.add(self.client_address[1])
+        action = server.script.pop(0) if server.script else 'ok'
+        if action == 'slow':
+            time.sleep(0.5)
+        if action == 'error':
+            self.send_response(503)
+            body = b'{}'
+        else:
+            self.send_response(200)
+            body = json.dumps({'status': 'OK', 'predictions': []}).encode()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GoogleAPIClientTests(SimpleTestCase):
+    """Exercise the shared Google client against a local fake Places server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakePlacesHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = 0
+        self.server.client_ports = set()
+        self.server.script = []
+        settings_override = override_settings(
+            GOOGLE_PLACES_BASE_URL=f"http://127.0.0.1:{self.server.server_address[1]}",
+            GOOGLE_API_READ_TIMEOUT=0.2,
+            GOOGLE_API_MAX_RETRIES=2,
+            GOOGLE_API_RETRY_BACKOFF=0.01,
+            GOOGLE_API_DEADLINE=5,
+            GOOGLE_API_BREAKER_THRESHOLD=2,
+            GOOGLE_API_BREAKER_RESET_TIMEOUT=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_google_client()
+        self.addCleanup(reset_google_client)
+
+    def test_reuses_pooled_connection(self):
+        client = get_google_client()
+        for _ in range(5):
+            self.assertEqual(client.get_json('autocomplete/json', {'input': 'joe'})['status'], 'OK')
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_retries_server_errors(self):
+        self.server.script = ['error', 'error']
+        data = get_google_client().get_json('autocomplete/json', {'input': 'joe'})
+        self.assertEqual(data['status'], 'OK')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_read_timeout_gives_up_after_retry_budget(self):
+        self.server.script = ['slow', 'slow', 'slow']
+        with self.assertRaises(GoogleAPIError):
+            get_google_client().get_json('autocomplete/json', {'input': 'joe'})
+        self.assertEqual(self.server.requests, 3)
+
+    def test_circuit_opens_and_fails_fast(self):
+        self.server.script = ['error'] * 6
+        client = get_google_client()
+        for _ in range(2):
+            with self.assertRaises(GoogleAPIError):
+                client.get_json('autocomplete/json', {'input': 'joe'})
+        requests_before = self.server.requests
+        with self.assertRaises(CircuitOpenError):
+            client.get_json('autocomplete/json', {'input': 'joe'})
+        self.assertEqual(self.server.requests, requests_before)
+
+    @override_settings(GOOGLE_API_READ_TIMEOUT=2, GOOGLE_API_DEADLINE=0.2)
+    def test_deadline_caps_each_attempt(self):
+        reset_google_client()
+        self.server.script = ['slow']
+        started = time.monotonic()
+        with self.assertRaises(GoogleAPIError):
+            get_google_client().get_json('autocomplete/json', {'input': 'joe'})
+        self.assertLess(time.monotonic() - started, 0.45)
+
+    def test_cancelled_trial_releases_the_breaker(self):
+        breaker = get_circuit_breaker()
+        breaker.failures, breaker.opened_at = 2, time.monotonic() - 60
+        self.server.script = ['slow']
+
+        async def cancel_trial():
+            client = get_async_google_client()
+            trial = asyncio.ensure_future(client.get_json('autocomplete/json', {'input': 'joe'}))
+            await asyncio.sleep(0.1)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+            await client.client.aclose()
+
+        asyncio.run(cancel_trial())
+        self.assertEqual(get_google_client().get_json('autocomplete/json', {'input': 'joe'})['status'], 'OK')
+        self.assertEqual(breaker.state, 'closed')
+
+
+def png_bytes(color):
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(output, format='PNG')
+    return output.getvalue()
+
+
+class PhotoCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PLACE_PHOTO_CACHE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        photo_cache._cache_bytes = None
+        self.fetches = []
+
+        def get_bytes(path, params):
+            self.fetches.append(params['photoreference'])
+            time.sleep(0.1)
+            return png_bytes(len(self.fetches) * 20), 'image/png'
+
+        client = mock.patch('contacts.photo_cache.get_google_client')
+        client.start().return_value.get_bytes.side_effect = get_bytes
+        self.addCleanup(client.stop)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(photo_cache.get_photo('ref', 200))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.fetches, ['ref'])
+        self.assertEqual(len({digest for _, digest, _ in results}), 1)
+
+    def test_misses_scan_the_cache_only_when_it_may_be_full(self):
+        with mock.patch('contacts.photo_cache.evict_photos', wraps=photo_cache.evict_photos) as evict:
+            photo_cache.get_photo('first', 200)
+            photo_cache.get_photo('second', 200)
+            self.assertEqual(evict.call_count, 1)
+            with override_settings(PLACE_PHOTO_CACHE_MAX_BYTES=1):
+                photo_cache.get_photo('third', 200)
+            self.assertEqual(evict.call_count, 2)
+
+
+def make_user(email):
+    return get_user_model().objects.create_user(email, 'password', business_name='Test Business')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONTACT_WRITE_BUFFER_ENABLED=False,
+)
+class BulkReviewEmailTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.other = make_user('other@example.com')
+
+    def test_unresolved_ids_count_as_failed(self):
+        own = Contact.objects.create(user=self.user, name='Ann', phone='1', email='ann@example.com')
+        foreign = Contact.objects.create(user=self.other, name='Bob', phone='2', email='bob@example.com')
+        result = send_bulk_review_emails([own.id, foreign.id, uuid.uuid4(), own.id], self.user)
+        self.assertEqual(result['success_count'], 1)
+        self.assertEqual(result['failed_count'], 2)
+        self.assertEqual(len(mail.outbox), 1)
+        own.refresh_from_db()
+        self.assertEqual(own.review_status, 'sent')
+
+    @override_settings(CONTACT_WRITE_BUFFER_ENABLED=True)
+    def test_single_send_is_written_through(self):
+        contact = Contact.objects.create(user=self.user, name='Ann', phone='1', email='ann@example.com')
+        self.assertTrue(send_review_email(contact, self.user))
+        contact.refresh_from_db()
+        self.assertEqual(contact.review_status, 'sent')
+
+    def test_logged_link_is_the_one_sent(self):
+        contact = Contact.objects.create(
+            user=self.user, name='Ann', phone='1', email='ann@example.com', business_place_id='ChIJ'
+        )
+        with self.assertLogs('contacts.email_service', 'DEBUG') as logs:
+            send_review_email(contact, self.user)
+        logged = next(record.review_link for record in logs.records if hasattr(record, 'review_link'))
+        self.assertEqual(logged, contact.review_url)
+        self.assertIn(logged, mail.outbox[0].body)
+
+
+
+class WorkerKilled(BaseException):
+    pass
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONTACT_WRITE_BUFFER_ENABLED=False,
+    EMAIL_RATE_LIMIT_ENABLED=False,
+)
+class EmailQueueTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.contacts = [
+            Contact.objects.create(user=self.user, name='C', phone=str(n), email=f'c{n}@example.com') for n in range(3)
+        ]
+        self.contact_ids = [contact.id for contact in self.contacts]
+
+    def test_requeue_leaves_live_leases_alone(self):
+        live = enqueue_bulk_email_job(self.contact_ids[:1], self.user)
+        dead = enqueue_bulk_email_job(self.contact_ids[1:], self.user)
+        claim_next_job('worker-a')
+        claim_next_job('worker-b')
+        EmailJob.objects.filter(id=dead.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(EmailJob.objects.get(id=live.id).status, 'running')
+        self.assertEqual(EmailJob.objects.get(id=dead.id).status, 'queued')
+
+    def test_crashed_job_resumes_after_the_last_sent_email(self):
+        job = enqueue_bulk_email_job(self.contact_ids, self.user)
+        send_messages = locmem.EmailBackend.send_messages
+
+        def killed_on_second_email(backend, messages):
+            if mail.outbox:
+                raise WorkerKilled
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', killed_on_second_email):
+            with self.assertRaises(WorkerKilled):
+                run_job(claim_next_job('worker-a'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_count), ('running', 1))
+
+        EmailJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now())
+        requeue_stale_jobs()
+        self.assertEqual(run_job(claim_next_job('worker-b')), 'completed')
+        self.assertEqual([email.to[0] for email in mail.outbox], ['c0@example.com', 'c1@example.com', 'c2@example.com'])
+        job.refresh_from_db()
+        self.assertEqual((job.processed_count, job.success_count, job.failed_count), (3, 3, 0))
+
+    def test_worker_stops_once_its_job_is_taken_over(self):
+        job = enqueue_bulk_email_job(self.contact_ids, self.user)
+        claimed = claim_next_job('worker-a')
+        EmailJob.objects.filter(id=job.id).update(claimed_by='worker-b')
+        self.assertEqual(run_job(claimed), 'lost')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EmailJob.objects.get(id=job.id).processed_count, 0)
+
+    def test_status_endpoint_reports_progress_to_the_owner_only(self):
+        job = enqueue_bulk_email_job(self.contact_ids + [uuid.uuid4()], self.user)
+        run_job(claim_next_job())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('bulk-email-status', args=[job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [response.data[field] for field in ('status', 'total_count', 'processed_count', 'success_count', 'failed_count')],
+            ['completed', 4, 4, 3, 1],
+        )
+        client.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(client.get(reverse('bulk-email-status', args=[job.id])).status_code, 404)
+
+
+class ContactImportTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        Contact.objects.create(user=self.user, name='Existing', phone='1', email='existing@example.com')
+
+    def rows(self, text):
+        return iter_csv_rows(io.BytesIO(text.encode()))
+
+    def test_report_counts(self):
+        report = import_contacts(self.user, self.rows(
+            "Name,Phone,Email\n"
+            "Ann,2,ann@example.com\n"
+            "Bad,3,not-an-email\n"
+            "Again,4,existing@example.com\n"
+            "Ann twice,5,ann@example.com\n"
+        ))
+        self.assertEqual(report['total_rows'], 4)
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['duplicates'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5])
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), 2)
+
+    def test_created_excludes_rows_lost_to_a_conflict(self):
+        bulk_create = Contact.objects.bulk_create
+
+        def concurrent_insert(contacts, **kwargs):
+            # Another request adds one of the emails between the check and the insert
+            Contact.objects.create(user=self.user, name='Racer', phone='9', email='bob@example.com')
+            return bulk_create(contacts, **kwargs)
+
+        with mock.patch.object(Contact.objects, 'bulk_create', side_effect=concurrent_insert):
+            report = import_contacts(self.user, self.rows(
+                "name,phone,email\nAnn,2,ann@example.com\nBob,3,bob@example.com\n"
+            ))
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['duplicates'], 1)
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), 3)
+
+
+class ContactExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_formula_cells_are_quoted(self):
+        Contact.objects.create(user=self.user, name='=HYPERLINK("http://x")', phone='+1 555 0100', email='a@example.com')
+        Contact.objects.create(user=self.user, name='-2+cmd|x', phone='-(555) 0100', email='b@example.com')
+        lines = list(iter_contacts_csv(Contact.objects.filter(user=self.user)))
+        rows = sorted(lines[1:])
+        self.assertTrue(rows[0].startswith("\"'=HYPERLINK(\"\"http://x\"\")\",+1 555 0100,a@example.com,"))
+        self.assertTrue(rows[1].startswith("'-2+cmd|x,-(555) 0100,b@example.com,"))
+
+    def test_rejects_unknown_review_status(self):
+        response = self.client.get(reverse('contact-export'), {'review_status': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PrefixCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = PrefixCache(max_entries=100, ttl=60, min_prefix_length=3)
+
+    def test_empty_response_is_not_cached(self):
+        # An upstream error or ZERO_RESULTS must not answer longer inputs
+        self.cache.insert('joe', [])
+        self.assertEqual(self.cache.lookup('joe'), (None, False))
+        self.assertEqual(self.cache.lookup("joe's pizza"), (None, False))
+
+    def test_longer_input_filters_cached_prefix(self):
+        self.cache.insert('joe', [{'description': "Joe's Pizza"}, {'description': 'Joe Auto Repair'}])
+        self.assertEqual(self.cache.lookup('joe piz'), ([{'description': "Joe's Pizza"}], False))
+
+    def test_truncated_prefix_goes_upstream(self):
+        self.cache.insert('joe', [{'description': f"Joe's Pizza {n}"} for n in range(5)])
+        self.assertEqual(self.cache.lookup('joe piz'), (None, False))
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    def test_follower_survives_cancelled_leader(self):
+        async def scenario():
+            flight = AsyncSingleFlight()
+            release = asyncio.Event()
+            calls = []
+
+            async def fetch():
+                calls.append(1)
+                if len(calls) == 1:
+                    await release.wait()
+                return 'result'
+
+            leader = asyncio.create_task(flight.do('joe', fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do('joe', fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            result = await asyncio.wait_for(follower, timeout=1)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return result, len(calls)
+
+        self.assertEqual(asyncio.run(scenario()), (('result', False), 2))
+
+
+class TrackingRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+
+    def contact(self, email, review_status):
+        return Contact.objects.create(user=self.user, name='C', phone='1', email=email, review_status=review_status)
+
+    def test_click_marks_pending_not_completed(self):
+        sent = self.contact('sent@example.com', 'sent')
+        completed = self.contact('done@example.com', 'completed')
+        now = timezone.now()
+        apply_events([(sent.pk, 'click', now), (completed.pk, 'click', now)])
+        sent.refresh_from_db()
+        completed.refresh_from_db()
+        self.assertEqual((sent.review_status, sent.click_count), ('pending', 1))
+        self.assertEqual((completed.review_status, completed.click_count), ('completed', 1))
+
+    def test_only_tracked_opens_count_as_opened(self):
+        clicked = self.contact('clicked@example.com', 'sent')
+        opened = self.contact('opened@example.com', 'sent')
+        now = timezone.now()
+        apply_events([(clicked.pk, 'click', now), (opened.pk, 'open', now), (opened.pk, 'click', now)])
+        stats = DailyReviewStats.objects.get(user=self.user, day=timezone.localdate())
+        self.assertEqual(stats.opened, 1)
+        self.assertEqual(Contact.objects.filter(user=self.user, review_status='pending').count(), 2)
+
+    def test_rollup_applies_events_committed_out_of_id_order(self):
+        contact = self.contact('sent@example.com', 'sent')
+        TrackingEvent.objects.create(id=10, contact=contact, event_type='open', occurred_at=timezone.now())
+        self.assertEqual(rollup_tracking_events(), 1)
+        # A concurrent writer's lower id commits after the rollup passed it
+        TrackingEvent.objects.create(id=5, contact=contact, event_type='click', occurred_at=timezone.now())
+        self.assertEqual(rollup_tracking_events(), 1)
+        self.assertEqual(rollup_tracking_events(), 0)
+        contact.refresh_from_db()
+        self.assertEqual((contact.open_count, contact.click_count), (1, 1))
+
+
+class CampaignTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.campaign = Campaign.objects.create(user=self.user, name='Follow up', status='active')
+        CampaignStep.objects.create(campaign=self.campaign, position=0)
+        self.contacts = [
+            Contact.objects.create(user=self.user, name='C', phone='1', email=f'c{n}@example.com') for n in range(3)
+        ]
+
+    def test_enroll_returns_newly_enrolled_count(self):
+        self.assertEqual(enroll_contacts(self.campaign, [self.contacts[0].id]), 1)
+        self.assertEqual(enroll_contacts(self.campaign, [contact.id for contact in self.contacts]), 2)
+
+    def test_paused_campaign_enrollments_are_not_claimed(self):
+        enroll_contacts(self.campaign, [contact.id for contact in self.contacts])
+        url = reverse('campaign-detail', args=[self.campaign.id])
+        self.assertEqual(self.client.patch(url, {'status': 'paused'}, format='json').status_code, 200)
+        self.assertEqual(CampaignEnrollment.objects.filter(status='paused').count(), 3)
+        self.assertEqual(claim_due_enrollments(10), [])
+
+        self.client.patch(url, {'status': 'active'}, format='json')
+        self.assertEqual(len(claim_due_enrollments(10)), 3)
+
+    def test_malformed_contact_ids_are_rejected(self):
+        response = self.client.post(
+            reverse('campaign-enroll', args=[self.campaign.id]), {'contact_ids': ['not-a-uuid']}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('bulk-email'), {'contact_ids': ['not-a-uuid']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_completed_review_stops_the_campaign(self):
+        contact = self.contacts[0]
+        enroll_contacts(self.campaign, [contact.id])
+        response = self.client.post(reverse('contact-complete', args=[contact.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['contact']['review_status'], 'completed')
+        self.assertEqual(DailyReviewStats.objects.get(user=self.user, day=timezone.localdate()).completed, 1)
+
+        self.assertEqual(process_enrollments(claim_due_enrollments(10))['stopped'], 1)
+        self.assertEqual(CampaignEnrollment.objects.get(contact=contact).status, 'stopped')
+
+        # A buffered 'sent' applied later does not undo the completion
+        apply_contact_writes({str(contact.id): (timezone.now(), {'review_status': 'sent'})})
+        contact.refresh_from_db()
+        self.assertEqual(contact.review_status, 'completed')
+
+        self.client.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(self.client.post(reverse('contact-complete', args=[self.contacts[1].id])).status_code, 404)
+
+
+class EmailTemplateTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rejects_unknown_and_formatted_placeholders(self):
+        for body in ('Hi {name}', 'Hi {customer_name!r}', 'Hi {customer_name'):
+            with self.assertRaises(TemplateSyntaxError):
+                compile_template('Subject', body)
+        response = self.client.post(
+            reverse('email-template-list-create'), {'name': 'T', 'subject': 'S', 'body': 'Hi {name}'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_renders_text_and_escaped_html(self):
+        template = compile_template('Review {business_name}', 'Hi {first_name} <3\n\n{review_link}')
+        contact = Contact(name='Ann Lee', email='ann@example.com', review_url='https://r.example/r/abc&x')
+        [email] = render_review_emails([contact], self.user, template)
+        self.assertEqual(email.subject, 'Review Test Business')
+        self.assertEqual(email.body, 'Hi Ann <3\n\nhttps://r.example/r/abc&x')
+        html = email.alternatives[0][0]
+        self.assertIn('Hi Ann &lt;3', html)
+        self.assertIn('<a href="https://r.example/r/abc&amp;x">https://r.example/r/abc&amp;x</a>', html)
+
+    def test_making_a_template_default_clears_the_previous_one(self):
+        url = reverse('email-template-list-create')
+        first = self.client.post(url, {'name': 'A', 'subject': 'S', 'body': 'B', 'is_default': True}, format='json')
+        second = self.client.post(url, {'name': 'B', 'subject': 'S', 'body': 'B', 'is_default': True}, format='json')
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        defaults = EmailTemplate.objects.filter(user=self.user, is_default=True).values_list('name', flat=True)
+        self.assertEqual(list(defaults), ['B'])
+
+
+@override_settings(REQUEST_LOG_SAMPLE_RATE=1.0)
+class RequestTimingMiddlewareTests(TestCase):
+    def test_counts_queries_of_sync_views(self):
+        def view(request):
+            list(Contact.objects.all())
+            list(Contact.objects.all())
+            return HttpResponse()
+
+        with self.assertLogs('bonratepro.requests', 'INFO') as logs:
+            RequestTimingMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(logs.records[0].db_queries, 2)
+
+    def test_counts_queries_of_async_views_on_other_threads(self):
+        async def view(request):
+            await sync_to_async(lambda: list(Contact.objects.all()), thread_sensitive=False)()
+            return HttpResponse()
+
+        with self.assertLogs('bonratepro.requests', 'INFO') as logs:
+            asyncio.run(RequestTimingMiddleware(view)(RequestFactory().get('/')))
+        self.assertEqual(logs.records[0].db_queries, 1)
+
+
+class ContactWriteBufferTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+        self.contact = Contact.objects.create(user=self.user, name='Ann', phone='1', email='ann@example.com')
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        self.journal_dir = Path(journal_dir.name)
+
+    def sent_change(self, at):
+        return str(self.contact.pk), at, {'review_status': 'sent', 'last_contact': at}
+
+    def write_segment(self, name, *lines):
+        path = self.journal_dir / name
+        path.write_text(''.join(lines))
+        return path
+
+    def test_merge_keeps_latest_value_per_field(self):
+        now = timezone.now()
+        pending = {}
+        merge_change(pending, 'c', now, {'review_status': 'sent'})
+        merge_change(pending, 'c', now - timedelta(seconds=5), {'review_status': 'not_sent', 'last_contact': now})
+        self.assertEqual(pending, {'c': (now, {'review_status': 'sent', 'last_contact': now})})
+
+    def test_torn_last_line_is_skipped(self):
+        line = _encode(*self.sent_change(timezone.now())) + '\n'
+        path = self.write_segment('w.jsonl', line, line[:len(line) // 2])
+        with self.assertLogs('contacts.write_buffer', 'WARNING'):
+            changes = read_journal(path)
+        self.assertEqual(list(changes), [str(self.contact.pk)])
+
+    def test_change_survives_an_unrelated_save(self):
+        contact_id, at, fields = self.sent_change(timezone.now())
+        self.contact.name = 'Ann Lee'
+        self.contact.save()
+        apply_contact_writes({contact_id: (at, fields)})
+        self.contact.refresh_from_db()
+        self.assertEqual((self.contact.name, self.contact.review_status), ('Ann Lee', 'sent'))
+        self.assertGreaterEqual(self.contact.last_contact, at)
+
+    def test_replayed_older_change_does_not_undo_newer_state(self):
+        Contact.objects.filter(pk=self.contact.pk).update(review_status='pending')
+        self.contact.refresh_from_db()
+        last_contact = self.contact.last_contact
+        contact_id, at, fields = self.sent_change(last_contact - timedelta(hours=1))
+        apply_contact_writes({contact_id: (at, fields)})
+        self.contact.refresh_from_db()
+        self.assertEqual((self.contact.review_status, self.contact.last_contact), ('pending', last_contact))
+
+    def test_recovers_segments_of_dead_writers_only(self):
+        line = _encode(*self.sent_change(timezone.now())) + '\n'
+        dead = self.write_segment('dead.jsonl', line)
+        live = self.write_segment('live.jsonl', line)
+        fd = os.open(live, os.O_RDONLY)
+        self.addCleanup(os.close, fd)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        buffer = ContactWriteBuffer(self.journal_dir, flush_interval=60, flush_size=100)
+        self.assertEqual(buffer.recover(), 1)
+        self.assertFalse(dead.exists())
+        self.assertTrue(live.exists())
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.review_status, 'sent')
+
+
+class ReviewStatsRollupTests(TestCase):
+    """The rollups must match a live COUNT(*) GROUP BY whichever path changed a status"""
+
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+
+    def assertRollupsMatch(self):
+        live = dict(
+            Contact.objects.filter(user=self.user).values_list('review_status').annotate(Count('id')).order_by()
+        )
+        rollup = dict(
+            ReviewStatusCount.objects.filter(user=self.user).exclude(count=0).values_list('review_status', 'count')
+        )
+        self.assertEqual(rollup, live)
+
+    @override_settings(CONTACT_WRITE_BUFFER_ENABLED=True)
+    def test_every_write_path_keeps_rollups_exact(self):
+        contacts = [
+            Contact.objects.create(user=self.user, name='C', phone='1', email=f'c{n}@example.com') for n in range(4)
+        ]
+        self.assertRollupsMatch()
+
+        contacts[3].delete()
+        self.assertRollupsMatch()
+
+        import_contacts(self.user, iter_csv_rows(io.BytesIO(b"name,phone,email\nD,2,d@example.com\nE,3,e@example.com\n")))
+        self.assertRollupsMatch()
+
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        buffer = ContactWriteBuffer(journal_dir.name, flush_interval=3600, flush_size=1000)
+        buffer.record([contact.pk for contact in contacts[:3]], review_status='sent', last_contact=timezone.now())
+        buffer.flush()
+        self.assertRollupsMatch()
+
+        apply_events([(contacts[0].pk, 'open', timezone.now())])
+        self.assertRollupsMatch()
+
+        contact = Contact.objects.get(pk=contacts[1].pk)
+        contact.review_status = 'completed'
+        contact.save()
+        contact = Contact.objects.get(pk=contacts[2].pk)
+        contact.review_status = 'pending'
+        contact.save()
+        self.assertRollupsMatch()
+
+        daily = DailyReviewStats.objects.get(user=self.user, day=timezone.localdate())
+        # The manual edit to pending is not an email open
+        self.assertEqual((daily.added, daily.sent, daily.opened, daily.completed), (6, 3, 1, 1))
+
+
+class ContactListFastPathTests(TestCase):
+    def setUp(self):
+        self.user = make_user('owner@example.com')
+
+    def test_compiled_representation_matches_serializer(self):
+        Contact.objects.create(user=self.user, name='Zoë \u2028', phone='1', email='zoe@example.com')
+        Contact.objects.create(
+            user=self.user, name='Ann', phone='2', email='ann@example.com', business_place_id='ChIJ', review_status='sent'
+        )
+        represent = compile_representation(ContactSerializer)
+        queryset = Contact.objects.filter(user=self.user).order_by('email')
+        rows = [represent(row) for row in queryset.values(*ContactSerializer.Meta.fields)]
+        self.assertEqual(rows, ContactSerializer(queryset, many=True).data)
+
+    def test_renderer_output_matches_drf(self):
+        data = {'results': [{'name': 'Zoë \u2028 \u2029 "quoted"\n', 'id': uuid.uuid4(), 'at': timezone.now(), 'n': 3, 'x': None}]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ShortLinkTests(TestCase):
+    def test_contact_without_a_place_has_no_target(self):
+        user = make_user('owner@example.com')
+        with_place = Contact.objects.create(user=user, name='Ann', phone='1', email='ann@example.com', business_place_id='ChIJ')
+        without_place = Contact.objects.create(user=user, name='Bob', phone='2', email='bob@example.com')
+        self.assertEqual(fetch_short_link(with_place.short_code), (str(with_place.id), with_place.google_review_url))
+        self.assertEqual(fetch_short_link(without_place.short_code), (str(without_place.id), ''))
+        self.assertEqual(self.client.get(f'/r/{without_place.short_code}').status_code, 404)
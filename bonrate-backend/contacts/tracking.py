@@ -0,0 +1,168 @@
+import atexit
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .utils import batched
+from .models import Contact, TrackingEvent, TrackingRollupCursor
+from .review_stats import record_status_changes
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 43-byte transparent 1x1 GIF served by the open pixel
+PIXEL_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+    b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+# Statuses only move forward: an open or a click marks the review pending.
+# A click is no proof of a review, since mail scanners prefetch links, so
+# completed is only set by the account owner, through ContactCompleteView
+STATUS_AFTER_EVENT = {
+    'open': ('pending', ['sent']),
+    'click': ('pending', ['sent']),
+}
+
+ROLLUP_CURSOR = 'review_status'
+
+class EventBuffer:
+    """Collect tracking events in memory and insert them in bulk.
+
+    A background thread flushes every ``flush_interval`` seconds, or sooner
+    once ``flush_size`` events are waiting, so a burst of hits costs one
+    bulk INSERT per batch rather than one per request. If the database is
+    unavailable events are kept for the next flush, up to ``max_pending``;
+    beyond that the oldest are dropped rather than growing without bound.
+    """
+
+    def __init__(self, flush_interval, flush_size, max_pending):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, contact_id, event_type):
+        with self.lock:
+            self.pending.append((contact_id, event_type, timezone.now()))
+            full = len(self.pending) >= self.flush_size
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='tracking-event-flusher', daemon=True)
+                self.thread.start()
+        if full:
+            self.wakeup.set()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Insert pending events; returns the number written"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+
+        events = [
+            TrackingEvent(contact_id=contact_id, event_type=event_type, occurred_at=occurred_at)
+            for contact_id, event_type, occurred_at in pending
+        ]
+        try:
+            TrackingEvent.objects.bulk_create(events, batch_size=settings.TRACKING_INSERT_BATCH_SIZE)
+        except Exception:
+            logger.exception("Failed to write %d tracking event(s); retrying next flush", len(pending))
+            with self.lock:
+                self.pending[:0] = pending
+                overflow = len(self.pending) - self.max_pending
+                if overflow > 0:
+                    del self.pending[:overflow]
+                    logger.error("Tracking buffer full, dropped %d event(s)", overflow)
+            return 0
+        return len(events)
+
+def _counter_case(values, default):
+    """CASE expression picking a per-contact value, for one UPDATE per chunk"""
+    return Case(*[When(pk=pk, then=Value(value)) for pk, value in values], default=default)
+
+def apply_events(events):
+    """Fold a batch of ``(contact_id, event_type, occurred_at)`` into Contact rows"""
+    counts = defaultdict(lambda: defaultdict(int))
+    latest = defaultdict(dict)
+    for contact_id, event_type, occurred_at in events:
+        counts[event_type][contact_id] += 1
+        previous = latest[event_type].get(contact_id)
+        if previous is None or occurred_at > previous:
+            latest[event_type][contact_id] = occurred_at
+
+    for event_type, count_field, time_field in (
+        ('open', 'open_count', 'last_opened_at'),
+        ('click', 'click_count', 'last_clicked_at'),
+    ):
+        for chunk in batched(counts[event_type].items(), 500):
+            contact_ids = [contact_id for contact_id, _ in chunk]
+            Contact.objects.filter(pk__in=contact_ids).update(**{
+                count_field: F(count_field) + _counter_case(chunk, 0),
+                time_field: _counter_case([(pk, latest[event_type][pk]) for pk in contact_ids], F(time_field)),
+            })
+
+    # A buffered 'sent' applied later cannot undo this: statuses only move forward
+    now = timezone.now()
+    for event_type in ('open', 'click'):
+        new_status, from_statuses = STATUS_AFTER_EVENT[event_type]
+        for chunk in batched(counts[event_type], 500):
+            moving = list(
+                Contact.objects.select_for_update()
+                .filter(pk__in=chunk, review_status__in=from_statuses)
+                .values_list('pk', 'user_id', 'review_status')
+            )
+            if not moving:
+                continue
+            Contact.objects.filter(pk__in=[pk for pk, _, _ in moving]).update(review_status=new_status, updated_at=now)
+            # A click alone is no open: images may be blocked
+            record_status_changes(
+                [(user_id, status, new_status) for _, user_id, status in moving], opened=event_type == 'open'
+            )
+
+def rollup_tracking_events(batch_size=None):
+    """Apply tracking events not yet rolled up.
+
+    Events are selected by their ``rolled_up`` flag rather than by id, so
+    one committed after a higher id was applied is still picked up. Each
+    batch is applied and flagged in one transaction, so a crash never
+    counts an event twice, and the cursor row lock keeps rollups from
+    running concurrently. Returns the number of events applied.
+    """
+    batch_size = batch_size or settings.TRACKING_ROLLUP_BATCH_SIZE
+    applied = 0
+    while True:
+        with transaction.atomic():
+            cursor, _ = TrackingRollupCursor.objects.select_for_update().get_or_create(name=ROLLUP_CURSOR)
+            rows = list(
+                TrackingEvent.objects.filter(rolled_up=False)
+                .order_by('id')
+                .values_list('id', 'contact_id', 'event_type', 'occurred_at')[:batch_size]
+            )
+            if not rows:
+                return applied
+            apply_events([row[1:] for row in rows])
+            TrackingEvent.objects.filter(id__in=[row[0] for row in rows]).update(rolled_up=True)
+            cursor.last_event_id = max(cursor.last_event_id, rows[-1][0])
+            cursor.save(update_fields=['last_event_id', 'updated_at'])
+        applied += len(rows)
+
+event_buffer = EventBuffer(
+    settings.TRACKING_FLUSH_INTERVAL,
+    settings.TRACKING_FLUSH_SIZE,
+    settings.TRACKING_BUFFER_MAX_EVENTS,
+)
+
+# Don't lose the last few seconds of events when a worker restarts
+atexit.register(event_buffer.flush)
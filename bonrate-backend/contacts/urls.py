@@ -1,12 +1,37 @@
+from django.conf import settings
 from django.urls import path
-from .views import ContactListCreateView, ContactDetailView, BulkEmailView, GooglePlacesSearchView
-from .business_profile_api import GooglePlacesSearchView as BusinessGooglePlacesSearchView, GooglePlaceDetailsView
+from .views import ContactListCreateView, ContactImportView, ContactExportView, ContactDetailView, ContactCompleteView, BulkEmailView, EmailJobStatusView, GooglePlacesSearchView, CampaignListCreateView, CampaignDetailView, CampaignEnrollView, EmailTemplateListCreateView, EmailTemplateDetailView, ContactSummaryView, ReviewStatsView
+from .business_profile_api import GooglePlacesSearchView as BusinessGooglePlacesSearchView, GooglePlaceDetailsView, PlacePhotoView, PlacesCacheStatsView
+from . import async_views
+
+# Serve the Places proxies as async views when running under an ASGI worker
+if settings.PLACES_ASYNC_VIEWS:
+    places_search_view = async_views.places_search
+    business_places_search_view = async_views.places_autocomplete
+    place_details_view = async_views.place_details
+else:
+    places_search_view = GooglePlacesSearchView.as_view()
+    business_places_search_view = BusinessGooglePlacesSearchView.as_view()
+    place_details_view = GooglePlaceDetailsView.as_view()
 
 urlpatterns = [
     path('', ContactListCreateView.as_view(), name='contact-list-create'),
+    path('import/', ContactImportView.as_view(), name='contact-import'),
+    path('export/', ContactExportView.as_view(), name='contact-export'),
+    path('summary/', ContactSummaryView.as_view(), name='contact-summary'),
+    path('stats/', ReviewStatsView.as_view(), name='review-stats'),
     path('bulk-email/', BulkEmailView.as_view(), name='bulk-email'),
-    path('search-places/', GooglePlacesSearchView.as_view(), name='search-places'),
-    path('business/google-places/search/', BusinessGooglePlacesSearchView.as_view(), name='business-google-places-search'),
-    path('business/google-places/details/<str:place_id>/', GooglePlaceDetailsView.as_view(), name='business-google-place-details'),
+    path('bulk-email/<uuid:job_id>/', EmailJobStatusView.as_view(), name='bulk-email-status'),
+    path('templates/', EmailTemplateListCreateView.as_view(), name='email-template-list-create'),
+    path('templates/<int:template_id>/', EmailTemplateDetailView.as_view(), name='email-template-detail'),
+    path('campaigns/', CampaignListCreateView.as_view(), name='campaign-list-create'),
+    path('campaigns/<uuid:campaign_id>/', CampaignDetailView.as_view(), name='campaign-detail'),
+    path('campaigns/<uuid:campaign_id>/enroll/', CampaignEnrollView.as_view(), name='campaign-enroll'),
+    path('search-places/', places_search_view, name='search-places'),
+    path('business/google-places/search/', business_places_search_view, name='business-google-places-search'),
+    path('business/google-places/details/<str:place_id>/', place_details_view, name='business-google-place-details'),
+    path('business/google-places/photo/<str:photo_reference>/', PlacePhotoView.as_view(), name='business-google-place-photo'),
+    path('business/google-places/cache-stats/', PlacesCacheStatsView.as_view(), name='business-google-places-cache-stats'),
     path('<uuid:contact_id>/', ContactDetailView.as_view(), name='contact-detail'),
+    path('<uuid:contact_id>/complete/', ContactCompleteView.as_view(), name='contact-complete'),
 ]
\ No newline at end of file
@@ -2,73 +2,151 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from django.shortcuts import get_object_or_404
-from .models import Contact
-from .serializers import ContactSerializer, CreateContactSerializer
-from .email_service import send_review_email, send_bulk_review_emails
-from .google_places import search_places
+from django.http import Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils import timezone
+from datetime import timedelta
 import uuid
-from datetime import datetime
+from django.db import transaction
+from django.db.models import Count
+from .models import Campaign, Contact, EmailJob, EmailTemplate
+from .serializers import CampaignSerializer, ContactSerializer, CreateContactSerializer, EmailJobSerializer, EmailTemplateSerializer, compile_representation
+from .email_service import send_review_email
+from .email_queue import enqueue_bulk_email_job
+from .google_places import search_places
+from .pagination import KeysetPagination
+from .renderers import FastJSONRenderer
+from .importers import ImportFormatError, import_contacts, iter_import_rows
+from .exporters import iter_contacts_csv
+from .short_links import resolve_short_code
+from .tracking import PIXEL_GIF, event_buffer
+from .campaigns import enroll_contacts, sync_enrollment_status
+from .rate_limit import acquire_send_tokens
+from .review_stats import contact_summary, review_stats
+from .write_buffer import apply_contact_writes
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Contact list rows skip ModelSerializer: values() rows go through a
+# precompiled field mapping that produces the same output
+represent_contact = compile_representation(ContactSerializer)
 
-# Temporary in-memory storage for testing
-temp_contacts = []
+def parse_contact_ids(value):
+    """``value`` as a list of UUIDs, or None if it is not a list of valid ids"""
+    if not isinstance(value, list):
+        return None
+    try:
+        return [uuid.UUID(str(contact_id)) for contact_id in value]
+    except ValueError:
+        return None
+
+def invalid_review_status_response():
+    return Response({
+        "error": f"Invalid review_status. Choose from: {', '.join(dict(Contact.REVIEW_STATUS_CHOICES))}"
+    }, status=status.HTTP_400_BAD_REQUEST)
 
 class ContactListCreateView(APIView):
-    permission_classes = []  # Temporarily removed for testing
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     def get(self, request):
-        """Get all contacts for the authenticated user"""
-        print(f"GET /api/contacts/ - returning {len(temp_contacts)} contacts")
-        return Response(temp_contacts)
+        """Get a page of contacts for the authenticated user"""
+        queryset = Contact.objects.filter(user=request.user)
+        
+        review_status = request.query_params.get('review_status')
+        if review_status:
+            if review_status not in dict(Contact.REVIEW_STATUS_CHOICES):
+                return invalid_review_status_response()
+            queryset = queryset.filter(review_status=review_status)
+        
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(queryset.values(*ContactSerializer.Meta.fields), request)
+        return Response(paginator.get_paginated_response_data([represent_contact(row) for row in rows]))
     
     def post(self, request):
         """Create a new contact"""
-        print(f"POST /api/contacts/ - Request data: {request.data}")
-        
-        # Create contact object for testing
-        contact = {
-            'id': str(uuid.uuid4()),
-            'name': request.data.get('name', ''),
-            'phone': request.data.get('phone', ''),
-            'email': request.data.get('email', ''),
-            'business_name': request.data.get('business_name', ''),
-            'business_place_id': request.data.get('business_place_id', ''),
-            'business_address': request.data.get('business_address', ''),
-            'google_review_url': f"https://search.google.com/local/writereview?placeid={request.data.get('business_place_id')}" if request.data.get('business_place_id') else None,
-            'review_url': None,
-            'created_at': datetime.now().isoformat(),
-            'review_status': 'not_sent'
-        }
-        
-        temp_contacts.append(contact)
-        print(f"Contact added to temp storage. Total contacts: {len(temp_contacts)}")
+        serializer = CreateContactSerializer(data=request.data, context={'request': request})
+        
+        if serializer.is_valid():
+            contact = serializer.save(user=request.user)
+            return Response({
+                "message": "Contact created successfully!",
+                "contact": ContactSerializer(contact).data
+            }, status=status.HTTP_201_CREATED)
+        
+        return Response({
+            "error": "Failed to create contact",
+            "details": serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class ContactImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        """Import contacts from an uploaded CSV or XLSX file"""
+        uploaded_file = request.FILES.get('file')
+        if not uploaded_file:
+            return Response({
+                "error": "No file uploaded"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            rows = iter_import_rows(uploaded_file)
+        except ImportFormatError as e:
+            return Response({
+                "error": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = import_contacts(request.user, rows)
+        if 'error' in report:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
-            "message": "Contact created successfully!",
-            "contact": contact
-        }, status=status.HTTP_201_CREATED)
+            "message": f"Imported {report['created']} contacts",
+            **report
+        }, status=status.HTTP_200_OK)
+
+class ContactExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Stream all of the user's contacts as CSV"""
+        queryset = Contact.objects.filter(user=request.user)
+        
+        review_status = request.query_params.get('review_status')
+        if review_status:
+            if review_status not in dict(Contact.REVIEW_STATUS_CHOICES):
+                return invalid_review_status_response()
+            queryset = queryset.filter(review_status=review_status)
+        
+        filename = f"contacts-{timezone.now():%Y%m%d}.csv"
+        response = StreamingHttpResponse(iter_contacts_csv(queryset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 class ContactDetailView(APIView):
     permission_classes = []  # Temporarily removed for testing
     
     def put(self, request, contact_id):
         """Update a contact"""
-        print(f"PUT /api/contacts/{contact_id}/ - User: {request.user}")
-        print(f"Request data: {request.data}")
-        
         contact = get_object_or_404(Contact, id=contact_id, user=request.user)
         serializer = CreateContactSerializer(contact, data=request.data, partial=True, context={'request': request})
         
         if serializer.is_valid():
             contact = serializer.save()
             response_serializer = ContactSerializer(contact)
-            print(f"Contact updated: {contact}")
+            logger.info("Contact updated", extra={'contact_id': str(contact.id), 'user_id': request.user.pk})
             return Response({
                 "message": "Contact updated successfully!",
                 "contact": response_serializer.data
             }, status=status.HTTP_200_OK)
         
-        print(f"Validation errors: {serializer.errors}")
+        logger.debug("Contact update rejected", extra={'contact_id': str(contact_id), 'errors': serializer.errors})
         return Response({
             "error": "Failed to update contact",
             "details": serializer.errors
@@ -76,22 +154,30 @@ class ContactDetailView(APIView):
     
     def delete(self, request, contact_id):
         """Delete a contact"""
-        print(f"DELETE /api/contacts/{contact_id}/ - User: {request.user}")
-        
         contact = get_object_or_404(Contact, id=contact_id, user=request.user)
         contact.delete()
         
-        print(f"Contact deleted: {contact_id}")
+        logger.info("Contact deleted", extra={'contact_id': str(contact_id), 'user_id': request.user.pk})
         return Response({
             "message": "Contact deleted successfully!"
         }, status=status.HTTP_200_OK)
     
     def post(self, request, contact_id):
         """Send email to a single contact"""
-        print(f"POST /api/contacts/{contact_id}/ - Send email - User: {request.user}")
-        
         contact = get_object_or_404(Contact, id=contact_id, user=request.user)
         
+        granted, retry_after = acquire_send_tokens(request.user, 1)
+        if not granted:
+            # Over the send rate limit: queue it for the worker instead of failing
+            job = enqueue_bulk_email_job(
+                [contact.id], request.user, run_after=timezone.now() + timedelta(seconds=retry_after)
+            )
+            return Response({
+                "message": f"Sending limit reached; the review email to {contact.name} will be sent shortly",
+                "job_id": str(job.id),
+                "job": EmailJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+        
         if send_review_email(contact, request.user):
             return Response({
                 "message": f"Review email sent to {contact.name} successfully!"
@@ -101,6 +187,20 @@ class ContactDetailView(APIView):
                 "error": "Failed to send email"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class ContactCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, contact_id):
+        """Mark a contact's review completed; statuses only move forward, so this never undoes anything"""
+        contact = get_object_or_404(Contact, id=contact_id, user=request.user)
+        apply_contact_writes({str(contact.id): (timezone.now(), {'review_status': 'completed'})})
+        contact.refresh_from_db()
+        logger.info("Contact review completed", extra={'contact_id': str(contact.id), 'user_id': request.user.pk})
+        return Response({
+            "message": f"Review from {contact.name} marked as completed",
+            "contact": ContactSerializer(contact).data
+        }, status=status.HTTP_200_OK)
+
 class BulkEmailView(APIView):
     permission_classes = []  # Temporarily removed for testing
     
@@ -113,14 +213,32 @@ class BulkEmailView(APIView):
                 "error": "No contacts selected"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        print(f"POST /api/contacts/bulk-email/ - User: {request.user} - Contacts: {contact_ids}")
+        contact_ids = parse_contact_ids(contact_ids)
+        if contact_ids is None:
+            return Response({
+                "error": "contact_ids must be a list of contact ids"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        template = None
+        if request.data.get('template_id'):
+            template = get_object_or_404(EmailTemplate, id=request.data['template_id'], user=request.user)
         
-        result = send_bulk_review_emails(contact_ids, request.user)
+        job = enqueue_bulk_email_job(contact_ids, request.user, template=template)
+        logger.info("Bulk email job queued", extra={'job_id': str(job.id), 'user_id': request.user.pk, 'contacts': job.total_count})
         
         return Response({
-            "message": f"Emails sent successfully to {result['success_count']} contacts",
-            "details": result
-        }, status=status.HTTP_200_OK)
+            "message": f"Email job queued for {job.total_count} contacts",
+            "job_id": str(job.id),
+            "job": EmailJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+class EmailJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, job_id):
+        """Report progress of a queued bulk email job"""
+        job = get_object_or_404(EmailJob, id=job_id, user=request.user)
+        return Response(EmailJobSerializer(job).data, status=status.HTTP_200_OK)
 
 class GooglePlacesSearchView(APIView):
     permission_classes = []  # Temporarily removed for testing
@@ -135,11 +253,194 @@ class GooglePlacesSearchView(APIView):
                 "error": "Query parameter is required"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        search_text = f"{query} in {location}" if location else query
-        print(f"Searching Google Places for: {search_text}")
-        
         results = search_places(query, location)
         
         return Response({
             "results": results
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+class EmailTemplateListCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """List the user's email templates"""
+        templates = EmailTemplate.objects.filter(user=request.user)
+        return Response(EmailTemplateSerializer(templates, many=True).data, status=status.HTTP_200_OK)
+    
+    def post(self, request):
+        """Create an email template; placeholders are validated on save"""
+        serializer = EmailTemplateSerializer(data=request.data)
+        if serializer.is_valid():
+            template = serializer.save(user=request.user)
+            return Response(EmailTemplateSerializer(template).data, status=status.HTTP_201_CREATED)
+        
+        return Response({
+            "error": "Failed to create template",
+            "details": serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class EmailTemplateDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, template_id):
+        template = get_object_or_404(EmailTemplate, id=template_id, user=request.user)
+        return Response(EmailTemplateSerializer(template).data, status=status.HTTP_200_OK)
+    
+    def put(self, request, template_id):
+        """Update a template; editing the subject or body bumps its version"""
+        template = get_object_or_404(EmailTemplate, id=template_id, user=request.user)
+        serializer = EmailTemplateSerializer(template, data=request.data, partial=True)
+        if serializer.is_valid():
+            template = serializer.save()
+            return Response(EmailTemplateSerializer(template).data, status=status.HTTP_200_OK)
+        
+        return Response({
+            "error": "Failed to update template",
+            "details": serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    def delete(self, request, template_id):
+        template = get_object_or_404(EmailTemplate, id=template_id, user=request.user)
+        template.delete()
+        return Response({
+            "message": "Template deleted successfully!"
+        }, status=status.HTTP_200_OK)
+
+class CampaignListCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """List the user's campaigns with their steps"""
+        campaigns = (
+            Campaign.objects.filter(user=request.user)
+            .prefetch_related('steps')
+            .annotate(enrolled_count=Count('enrollments'))
+        )
+        return Response(CampaignSerializer(campaigns, many=True).data, status=status.HTTP_200_OK)
+    
+    def post(self, request):
+        """Create a campaign and its steps"""
+        serializer = CampaignSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            with transaction.atomic():
+                campaign = serializer.save(user=request.user)
+            return Response(CampaignSerializer(campaign).data, status=status.HTTP_201_CREATED)
+        
+        return Response({
+            "error": "Failed to create campaign",
+            "details": serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class CampaignDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, campaign_id):
+        campaign = get_object_or_404(
+            Campaign.objects.annotate(enrolled_count=Count('enrollments')), id=campaign_id, user=request.user
+        )
+        return Response(CampaignSerializer(campaign).data, status=status.HTTP_200_OK)
+    
+    def patch(self, request, campaign_id):
+        """Rename a campaign or change its status (activate, pause, archive)"""
+        campaign = get_object_or_404(Campaign, id=campaign_id, user=request.user)
+        # Steps are fixed once contacts may be part-way through them
+        data = {field: request.data[field] for field in ('name', 'status') if field in request.data}
+        serializer = CampaignSerializer(campaign, data=data, partial=True)
+        if serializer.is_valid():
+            with transaction.atomic():
+                campaign = serializer.save()
+                sync_enrollment_status(campaign)
+            return Response(CampaignSerializer(campaign).data, status=status.HTTP_200_OK)
+        
+        return Response({
+            "error": "Failed to update campaign",
+            "details": serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class CampaignEnrollView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, campaign_id):
+        """Enroll contacts; the scheduler sends each step when it becomes due"""
+        campaign = get_object_or_404(Campaign, id=campaign_id, user=request.user)
+        contact_ids = request.data.get('contact_ids', [])
+        
+        if not contact_ids:
+            return Response({
+                "error": "No contacts selected"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        contact_ids = parse_contact_ids(contact_ids)
+        if contact_ids is None:
+            return Response({
+                "error": "contact_ids must be a list of contact ids"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            count = enroll_contacts(campaign, contact_ids)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            "message": f"{count} contacts enrolled in {campaign.name}",
+            "enrolled_count": count
+        }, status=status.HTTP_200_OK)
+
+class ContactSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Contact counts per review status; unchanged polls get a 304"""
+        summary, etag = contact_summary(request.user)
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = Response(summary, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        # Per-user data: browsers may keep it but must revalidate every time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+class ReviewStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Dashboard stats from the rollup tables, so cost does not grow with contacts"""
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= 366:
+            return Response({
+                "error": "days must be a number from 1 to 366"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(review_stats(request.user, days), status=status.HTTP_200_OK)
+
+def review_redirect(request, code):
+    """Send a review short link to the contact's Google review page.
+    
+    Plain Django view to keep the hot path short: the code is resolved from
+    cache and the click is buffered, so a hit normally touches no database.
+    """
+    link = resolve_short_code(code)
+    if link is None or not link[1]:
+        raise Http404("Unknown review link")
+    
+    contact_id, target = link
+    event_buffer.add(contact_id, 'click')
+    response = HttpResponseRedirect(target)
+    # Every click has to reach us to be counted
+    add_never_cache_headers(response)
+    return response
+
+def tracking_pixel(request, code):
+    """1x1 GIF embedded in review emails; records an open for the contact"""
+    link = resolve_short_code(code)
+    if link is not None:
+        event_buffer.add(link[0], 'open')
+    
+    # Unknown codes still get the image so mail clients show no broken icon
+    response = HttpResponse(PIXEL_GIF, content_type='image/gif')
+    add_never_cache_headers(response)
+    return response
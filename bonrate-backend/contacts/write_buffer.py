@@ -0,0 +1,255 @@
+import atexit
+import fcntl
+import json
+import os
+import socket
+import threading
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Contact
+from .review_stats import record_status_changes
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns the buffer writes; datetimes are stored in the journal as ISO strings
+BUFFERED_FIELDS = ('review_status', 'last_contact')
+DATETIME_FIELDS = {'last_contact'}
+
+# Review statuses in the order a contact moves through them
+STATUS_RANK = {status: rank for rank, (status, _) in enumerate(Contact.REVIEW_STATUS_CHOICES)}
+
+def merge_change(pending, contact_id, at, fields):
+    """Fold one change into ``pending``; for each field the latest ``at`` wins"""
+    current = pending.get(contact_id)
+    if current is None:
+        pending[contact_id] = (at, dict(fields))
+    elif at >= current[0]:
+        pending[contact_id] = (at, {**current[1], **fields})
+    else:
+        pending[contact_id] = (current[0], {**fields, **current[1]})
+
+def apply_contact_writes(changes, chunk_size=500):
+    """Write ``{contact_id: (at, fields)}`` with one UPDATE per chunk.
+
+    Each column is guarded on its own, not by the row's ``updated_at``, so
+    an unrelated save in between never loses the change: ``review_status``
+    only moves forward, so a stale or replayed 'sent' does not undo an
+    open or a completion, and ``last_contact`` only moves later. Status
+    moves are passed on to the review stats rollups. Returns the number of
+    contacts.
+    """
+    items = list(changes.items())
+    with transaction.atomic():
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            moves = []
+            rows = Contact.objects.select_for_update().filter(pk__in=[pk for pk, _ in chunk])
+            for pk, user_id, status in rows.values_list('pk', 'user_id', 'review_status'):
+                new_status = changes[str(pk)][1].get('review_status')
+                if new_status is not None and STATUS_RANK[new_status] > STATUS_RANK.get(status, 0):
+                    moves.append((user_id, status, new_status))
+            updates = {}
+            status_whens = [
+                When(pk=pk, review_status__in=_statuses_before(fields['review_status']), then=Value(fields['review_status']))
+                for pk, (_, fields) in chunk if 'review_status' in fields
+            ]
+            if status_whens:
+                updates['review_status'] = Case(*status_whens, default=F('review_status'))
+            contact_whens = [
+                When(pk=pk, then=Greatest(F('last_contact'), Value(fields['last_contact'], output_field=DateTimeField())))
+                for pk, (_, fields) in chunk if 'last_contact' in fields
+            ]
+            if contact_whens:
+                updates['last_contact'] = Case(*contact_whens, default=F('last_contact'), output_field=DateTimeField())
+            updates['updated_at'] = Case(
+                *[When(pk=pk, then=Greatest(F('updated_at'), Value(at, output_field=DateTimeField()))) for pk, (at, _) in chunk],
+                default=F('updated_at'),
+                output_field=DateTimeField(),
+            )
+            Contact.objects.filter(pk__in=[pk for pk, _ in chunk]).update(**updates)
+            record_status_changes(moves)
+    return len(items)
+
+def _statuses_before(status):
+    """Statuses a contact may move to ``status`` from, including itself"""
+    return [other for other, rank in STATUS_RANK.items() if rank <= STATUS_RANK[status]]
+
+def _encode(contact_id, at, fields):
+    values = {name: value.isoformat() if name in DATETIME_FIELDS else value for name, value in fields.items()}
+    return json.dumps({'id': contact_id, 'at': at.isoformat(), 'fields': values}, separators=(',', ':'))
+
+def _decode(line):
+    entry = json.loads(line)
+    fields = {
+        name: parse_datetime(value) if name in DATETIME_FIELDS else value
+        for name, value in entry['fields'].items()
+        if name in BUFFERED_FIELDS
+    }
+    return entry['id'], parse_datetime(entry['at']), fields
+
+def read_journal(path):
+    """Merged changes from one journal segment; a torn last line is skipped"""
+    changes = {}
+    with open(path, encoding='utf-8') as journal:
+        for number, line in enumerate(journal, 1):
+            try:
+                merge_change(changes, *_decode(line))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping unreadable line %d in %s", number, path)
+    return changes
+
+class ContactWriteBuffer:
+    """Coalesce Contact status and timestamp writes and apply them in batches.
+
+    Each change is appended to this process's journal segment before it is
+    buffered, then merged with any pending change to the same contact, so a
+    contact touched many times within ``flush_interval`` is written once. A
+    background thread flushes everything pending as one UPDATE per chunk,
+    then deletes the segments that flush covered. Each segment is locked by
+    its writer; segments whose writer died unflushed are replayed by the next
+    buffer to start, and replaying a change twice or late is harmless.
+    """
+
+    def __init__(self, journal_dir, flush_interval, flush_size, fsync=False):
+        self.journal_dir = Path(journal_dir)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+        self.pending = {}
+        self.segment = None
+        self.sealed = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def record(self, contact_ids, **fields):
+        """Buffer ``fields`` for each contact; the change is journaled on return"""
+        at = timezone.now()
+        contact_ids = [str(contact_id) for contact_id in contact_ids]
+        if not contact_ids:
+            return
+        if not settings.CONTACT_WRITE_BUFFER_ENABLED:
+            apply_contact_writes({contact_id: (at, fields) for contact_id in contact_ids})
+            return
+        lines = ''.join(_encode(contact_id, at, fields) + '\n' for contact_id in contact_ids)
+        with self.lock:
+            try:
+                self._start()
+                if self.segment is None:
+                    self.segment = self._open_segment()
+                os.write(self.segment[1], lines.encode())
+                if self.fsync:
+                    os.fsync(self.segment[1])
+            except OSError:
+                logger.exception("Contact write journal unavailable; writing %d contact(s) directly", len(contact_ids))
+                journaled = False
+            else:
+                journaled = True
+                for contact_id in contact_ids:
+                    merge_change(self.pending, contact_id, at, fields)
+                full = len(self.pending) >= self.flush_size
+        if not journaled:
+            apply_contact_writes({contact_id: (at, fields) for contact_id in contact_ids})
+        elif full:
+            self.wakeup.set()
+
+    def _start(self):
+        # Threads and file locks do not survive a fork, so a forked worker starts afresh
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.pending, self.segment, self.sealed = {}, None, []
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name='contact-write-flusher', daemon=True)
+        self.thread.start()
+
+    def _open_segment(self):
+        # Locked under a temporary name first, so recovery never sees it unlocked
+        name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        temp_path = self.journal_dir / f".{name}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        path = self.journal_dir / f"{name}.jsonl"
+        os.rename(temp_path, path)
+        return path, fd
+
+    def _run(self):
+        close_old_connections()
+        try:
+            self.recover()
+        except Exception:
+            logger.exception("Failed to replay contact write journals")
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Apply pending changes; returns the number of contacts written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            segments, self.sealed = self.sealed, []
+            if self.segment is not None:
+                segments.append(self.segment)
+                self.segment = None
+        if not pending and not segments:
+            return 0
+
+        try:
+            apply_contact_writes(pending)
+        except Exception:
+            logger.exception("Failed to write %d contact change(s); retrying next flush", len(pending))
+            with self.lock:
+                # Changes recorded since the swap are newer and win the merge
+                for contact_id, (at, fields) in pending.items():
+                    merge_change(self.pending, contact_id, at, fields)
+                self.sealed[:0] = segments
+            return 0
+
+        for path, fd in segments:
+            path.unlink(missing_ok=True)
+            os.close(fd)
+        return len(pending)
+
+    def recover(self):
+        """Replay journal segments left by writers that are no longer running"""
+        replayed = 0
+        for path in sorted(self.journal_dir.glob('*.jsonl')):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                # The writer may have flushed and removed it while we waited
+                if os.fstat(fd).st_nlink == 0:
+                    continue
+                replayed += apply_contact_writes(read_journal(path))
+                path.unlink(missing_ok=True)
+            finally:
+                os.close(fd)
+        if replayed:
+            logger.info("Replayed %d contact change(s) from unflushed journals", replayed)
+        return replayed
+
+contact_writes = ContactWriteBuffer(
+    settings.CONTACT_WRITE_JOURNAL_DIR,
+    settings.CONTACT_WRITE_FLUSH_INTERVAL,
+    settings.CONTACT_WRITE_FLUSH_SIZE,
+    fsync=settings.CONTACT_WRITE_FSYNC,
+)
+
+# Apply what is pending on a clean shutdown; the journal covers a crash
+atexit.register(contact_writes.flush)
@@ -4,6 +4,9 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from .models import User
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class BusinessProfileView(APIView):
     permission_classes = []  # Temporarily removed for testing
@@ -16,7 +19,7 @@ class BusinessProfileView(APIView):
     
     def post(self, request):
         data = request.data
-        print(f"Received data: {data}")
+        logger.debug("Business profile update", extra={'fields': sorted(data)})
         
         # For testing, save data to class attribute
         # In production, this would save to authenticated user's profile
@@ -11,15 +11,17 @@ from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
+import logging
+
+logger = logging.getLogger(__name__)
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
     def post(self, request):
-        print("Registration data received:", request.data)  # Debug log
-        
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
+            logger.info("Account registered", extra={'user_id': user.pk})
             
             # Generate tokens for immediate login
             refresh = RefreshToken.for_user(user)
@@ -39,7 +41,7 @@ class RegisterView(APIView):
                 }
             }, status=status.HTTP_201_CREATED)
         
-        print("Validation errors:", serializer.errors)  # Debug log
+        logger.debug("Registration rejected", extra={'errors': serializer.errors})
         return Response({
             "error": "Registration failed",
             "details": serializer.errors
@@ -99,8 +101,8 @@ class ForgotPasswordView(APIView):
             # Create reset link
             reset_link = f"http://146.190.249.229:3000/reset-password/{uid}/{token}/"
             
-            # Debug: Log the reset link
-            print(f"Password reset link for {email}: {reset_link}")
+            # The link itself is a credential, so only the request is logged
+            logger.info("Password reset requested", extra={'user_id': user.pk})
             
             # Send email
             subject = "Reset Your Bonrate Pro Password"
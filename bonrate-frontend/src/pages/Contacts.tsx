@@ -26,10 +26,41 @@ interface BusinessSearchResult {
 }
 
 const API_BASE_URL = 'http://localhost:8000';
+// Contacts fetched per page; further pages are loaded on request
+const CONTACTS_PAGE_SIZE = 50;
+
+// Bearer token saved by AuthContext at login
+const getAuthHeaders = (): Record<string, string> => {
+  const token = localStorage.getItem('token');
+  return {
+    'Content-Type': 'application/json',
+    ...(token ? { Authorization: `Bearer ${token}` } : {})
+  };
+};
+
+interface ContactPage {
+  results: Contact[];
+  next: string | null;
+}
+
+const fetchContactPage = async (url: string): Promise<ContactPage> => {
+  const response = await fetch(url, { headers: getAuthHeaders() });
+  if (!response.ok) {
+    throw new Error(`Failed to load contacts, status: ${response.status}`);
+  }
+  const data = await response.json();
+  return {
+    results: Array.isArray(data?.results) ? data.results : [],
+    next: data?.next || null
+  };
+};
 
 const Contacts = () => {
   const [contacts, setContacts] = useState<Contact[]>([]);
+  const [totalContacts, setTotalContacts] = useState<number | null>(null);
+  const [nextPageUrl, setNextPageUrl] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showContactModal, setShowContactModal] = useState(false);
   const [editingContact, setEditingContact] = useState<Contact | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
@@ -54,33 +85,48 @@ const Contacts = () => {
 
 
 
+  // Loads the first page only; the rest come from "Load more"
   const loadContacts = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`${API_BASE_URL}/api/contacts/`, {
-        headers: {
-          'Content-Type': 'application/json'
-        }
-      });
-      
-      if (response.ok) {
-        try {
-          const data = await response.json();
-          setContacts(Array.isArray(data) ? data : []);
-        } catch (e) {
-          console.error('Failed to parse contacts JSON:', e);
-          setContacts([]);
-        }
-      } else {
-        console.error('Failed to load contacts, status:', response.status);
-        setContacts([]);
-      }
+      const page = await fetchContactPage(`${API_BASE_URL}/api/contacts/?page_size=${CONTACTS_PAGE_SIZE}`);
+      setContacts(page.results);
+      setNextPageUrl(page.next);
     } catch (error) {
       console.error('Load contacts error:', error);
       setContacts([]);
+      setNextPageUrl(null);
     } finally {
       setLoading(false);
     }
+    loadContactTotal();
+  };
+
+  const loadMoreContacts = async () => {
+    if (!nextPageUrl) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchContactPage(nextPageUrl);
+      setContacts(prev => [...prev, ...page.results]);
+      setNextPageUrl(page.next);
+    } catch (error) {
+      console.error('Load more contacts error:', error);
+      showNotification('error', 'Failed to load more contacts');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadContactTotal = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/contacts/summary/`, { headers: getAuthHeaders() });
+      if (response.ok) {
+        const summary = await response.json();
+        setTotalContacts(summary.total);
+      }
+    } catch (error) {
+      console.error('Load contact summary error:', error);
+    }
   };
 
   const showNotification = (type: 'success' | 'error', message: string) => {
@@ -121,9 +167,7 @@ const Contacts = () => {
 
       const response = await fetch(url, {
         method,
-        headers: {
-          'Content-Type': 'application/json'
-        },
+        headers: getAuthHeaders(),
         body: JSON.stringify(contactData)
       });
 
@@ -211,6 +255,25 @@ const Contacts = () => {
     }
   };
 
+  const handleMarkCompleted = async (contact: Contact) => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/contacts/${contact.id}/complete/`, {
+        method: 'POST',
+        headers: getAuthHeaders()
+      });
+      const data = await response.json();
+
+      if (response.ok) {
+        setContacts(prev => prev.map(c => (c.id === contact.id ? data.contact : c)));
+        showNotification('success', data.message);
+      } else {
+        showNotification('error', data.error || 'Failed to mark review completed');
+      }
+    } catch (error) {
+      showNotification('error', 'Failed to mark review completed');
+    }
+  };
+
   const copyReviewUrl = (url: string) => {
     navigator.clipboard.writeText(url);
     showNotification('success', 'Review URL copied to clipboard!');
@@ -286,7 +349,7 @@ const Contacts = () => {
   return (
     <Layout 
       title="Contacts" 
-      subtitle={`Manage your ${contacts.length} contacts`}
+      subtitle={`Manage your ${totalContacts ?? contacts.length} contacts`}
       headerActions={
         <Button 
           variant="primary" 
@@ -355,7 +418,7 @@ const Contacts = () => {
           </Col>
           <Col lg={4} className="text-lg-end">
             <div className="bg-white bg-opacity-20 rounded-4 p-3">
-              <div className="fw-bold fs-2">{contacts.length}</div>
+              <div className="fw-bold fs-2">{totalContacts ?? contacts.length}</div>
               <small className="opacity-90">Total Contacts</small>
             </div>
           </Col>
@@ -588,6 +651,18 @@ const Contacts = () => {
                         >
                           <i className="fas fa-paper-plane"></i>
                         </Button>
+                        {contact.review_status !== 'completed' && (
+                          <Button
+                            variant="light"
+                            size="sm"
+                            onClick={() => handleMarkCompleted(contact)}
+                            title="Mark review completed"
+                            className="rounded-pill border-0"
+                            style={{ background: '#e3f2fd', color: '#1565c0' }}
+                          >
+                            <i className="fas fa-check"></i>
+                          </Button>
+                        )}
                         <Button
                           variant="light"
                           size="sm"
@@ -605,6 +680,23 @@ const Contacts = () => {
               </tbody>
             </Table>
           )}
+          {nextPageUrl && (
+            <div className="text-center py-4">
+              <Button
+                variant="outline-primary"
+                onClick={loadMoreContacts}
+                disabled={loadingMore}
+                className="rounded-pill px-4"
+              >
+                {loadingMore ? (
+                  <Spinner animation="border" size="sm" className="me-2" />
+                ) : (
+                  <i className="fas fa-chevron-down me-2"></i>
+                )}
+                Load more contacts
+              </Button>
+            </div>
+          )}
         </Card.Body>
       </Card>
 
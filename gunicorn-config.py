@@ -1,6 +1,12 @@
+import os
+
 bind = "0.0.0.0:8000"
 workers = 2
-worker_class = "sync"
+# Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker (and
+# PLACES_ASYNC_VIEWS=True) to serve the ASGI app, where slow Google Places
+# calls await instead of blocking a worker
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+wsgi_app = "bonratepro.asgi:application" if "uvicorn" in worker_class else "bonratepro.wsgi:application"
 timeout = 30
 keepalive = 2
 max_requests = 1000